@@ -0,0 +1,175 @@
+"""Benchmark the fetch -> parse -> render pipeline offline.
+
+Times JSON decoding, pod-to-job association, job assembly, table building and
+a headless frame render at several namespace sizes, using synthetic mock data,
+a recorded ``kubectl get jobs,pods -o json`` payload or the first listing of a
+``kubmonitor --record`` log.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 1000,10000 --save base.json
+    python benchmarks/bench_pipeline.py --compare base.json --threshold 1.25
+    python benchmarks/bench_pipeline.py --input session.ndjson.gz
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console  # noqa: E402
+from rich.panel import Panel  # noqa: E402
+
+import monitor  # noqa: E402
+from mock_data import MockCluster  # noqa: E402
+from recording import iter_listings  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+PODS_PER_JOB = 2
+VIEWPORT_ROWS = 40
+
+
+def load_payload(pods, path=None):
+    """Return (jobs, pods, encoded list) for a dataset of roughly ``pods`` pods."""
+    if path and path.endswith('.gz'):
+        # The first recorded listing of each kind
+        found = {}
+        for _, _, grouped in iter_listings(path):
+            for kind, kind_items in grouped.items():
+                found.setdefault(kind, kind_items)
+            if 'Job' in found and 'Pod' in found:
+                break
+        items = found.get('Job', []) + found.get('Pod', [])
+        raw = json.dumps({'kind': 'List', 'items': items})
+    elif path:
+        with open(path, encoding='utf-8') as f:
+            raw = f.read()
+        items = json.loads(raw).get('items', [])
+    else:
+        cluster = MockCluster(jobs=max(1, pods // PODS_PER_JOB),
+                              pods_per_job=PODS_PER_JOB, seed=0)
+        items = list(cluster.iter_jobs()) + list(cluster.iter_pods())
+        raw = json.dumps({'kind': 'List', 'items': items})
+    jobs = [item for item in items if item.get('kind') == 'Job']
+    pods = [item for item in items if item.get('kind') == 'Pod']
+    return jobs, pods, raw
+
+
+def render_frame(jobs):
+    layout = monitor.make_layout()
+    quota = monitor.empty_quota()
+    layout["header"].update(Panel("Kubernetes Monitor - benchmark"))
+    layout["cluster_resources"].update(monitor.generate_cluster_resources(quota))
+    layout["local_resources"].update(
+        monitor.generate_local_resources(0.0, (0.0,) * 8, 0.0, ()))
+    layout["right"].update(Panel(
+        monitor.generate_table(monitor.JobTableModel(jobs),
+                               max_rows=VIEWPORT_ROWS),
+        title=f"Jobs ({len(jobs)})"))
+    console = Console(file=io.StringIO(), width=160, height=VIEWPORT_ROWS + 10,
+                      force_terminal=True, color_system="truecolor")
+    console.print(layout)
+
+
+def stages(jobs, pods, raw):
+    names = {(job['metadata'].get('namespace', ''), job['metadata']['name'])
+             for job in jobs}
+    built = monitor.build_jobs(jobs, pods)
+    model = monitor.JobTableModel(built)
+    return [
+        ('decode', lambda: json.loads(raw)),
+        ('associate', lambda: monitor.index_pods_by_job(pods, names)),
+        ('assemble', lambda: monitor.build_jobs(jobs, pods)),
+        ('row_index', lambda: monitor.JobTableModel(built)),
+        ('table', lambda: monitor.generate_table(model, max_rows=VIEWPORT_ROWS)),
+        ('frame', lambda: render_frame(built)),
+    ]
+
+
+def measure(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    # Separate pass: tracemalloc would distort the timings above
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes, repeat, path=None):
+    results = {}
+    for size in sizes:
+        jobs, pods, raw = load_payload(size, path)
+        items = len(jobs) + len(pods)
+        for stage, fn in stages(jobs, pods, raw):
+            seconds, peak = measure(fn, repeat)
+            results[f"{stage}@{size}"] = {
+                'stage': stage, 'size': size, 'items': items,
+                'seconds': seconds,
+                'items_per_sec': items / seconds if seconds else float('inf'),
+                'peak_bytes': peak,
+            }
+        if path:
+            break
+    return results
+
+
+def report(results, baseline=None, threshold=1.25):
+    regressions = []
+    print(f"{'stage':<10} {'size':>7} {'items':>7} {'time':>10} "
+          f"{'items/s':>12} {'peak':>10} {'vs base':>8}")
+    for key, row in results.items():
+        ratio = ""
+        base = (baseline or {}).get(key)
+        if base and base['seconds'] > 0:
+            change = row['seconds'] / base['seconds']
+            ratio = f"{change:.2f}x"
+            if change > threshold:
+                ratio += " !"
+                regressions.append(key)
+        print(f"{row['stage']:<10} {row['size']:>7} {row['items']:>7} "
+              f"{row['seconds'] * 1000:>8.2f}ms {row['items_per_sec']:>12,.0f} "
+              f"{row['peak_bytes'] / 2 ** 20:>8.1f}Mi {ratio:>8}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated pod counts")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--input', help="kubectl -o json payload or a "
+                        "--record log (.gz)")
+    parser.add_argument('--save', help="write results to this baseline file")
+    parser.add_argument('--compare', help="baseline file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run(sizes, args.repeat, args.input)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print(f"\nRegressions over {args.threshold}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
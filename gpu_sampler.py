@@ -0,0 +1,118 @@
+import shutil
+import subprocess
+import threading
+from collections import namedtuple
+
+GpuStat = namedtuple('GpuStat', ['index', 'util', 'mem_used', 'mem_total'])
+
+QUERY = "index,utilization.gpu,memory.used,memory.total"
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_smi_line(line):
+    parts = [p.strip() for p in line.split(',')]
+    if len(parts) != 4 or not parts[0].isdigit():
+        return None
+    return GpuStat(int(parts[0]), _to_float(parts[1]), _to_float(parts[2]),
+                   _to_float(parts[3]))
+
+
+def _load_nvml():
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        return pynvml
+    except Exception:
+        return None
+
+
+class GpuSampler:
+    """Samples GPU utilization and memory off the render loop.
+
+    The sampling tool is detected once: NVML bindings when importable,
+    otherwise a single long-lived ``nvidia-smi --loop-ms`` child whose CSV
+    stream is parsed line by line. With neither available the sampler never
+    starts a thread and ``read()`` returns an empty tuple.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._stats = {}
+        self._proc = None
+        self._stop = threading.Event()
+        self._nvml = _load_nvml()
+        self._smi = None if self._nvml else shutil.which('nvidia-smi')
+        self._thread = None
+        if self._nvml or self._smi:
+            target = self._run_nvml if self._nvml else self._run_smi
+            self._thread = threading.Thread(target=target, daemon=True)
+
+    @property
+    def available(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def read(self):
+        stats = self._stats
+        return tuple(stats[i] for i in sorted(stats))
+
+    def _publish(self, stat):
+        # Copy-on-write so read() never sees a dict being resized
+        stats = dict(self._stats)
+        stats[stat.index] = stat
+        self._stats = stats
+
+    def _run_nvml(self):
+        nvml = self._nvml
+        try:
+            handles = [nvml.nvmlDeviceGetHandleByIndex(i)
+                       for i in range(nvml.nvmlDeviceGetCount())]
+        except Exception:
+            return
+        while not self._stop.is_set():
+            for i, handle in enumerate(handles):
+                try:
+                    util = nvml.nvmlDeviceGetUtilizationRates(handle).gpu
+                    mem = nvml.nvmlDeviceGetMemoryInfo(handle)
+                    self._publish(GpuStat(i, float(util), mem.used / 2 ** 20,
+                                          mem.total / 2 ** 20))
+                except Exception:
+                    pass
+            self._stop.wait(self.interval)
+
+    def _run_smi(self):
+        cmd = [self._smi, f"--query-gpu={QUERY}",
+               "--format=csv,noheader,nounits",
+               f"--loop-ms={int(self.interval * 1000)}"]
+        while not self._stop.is_set():
+            try:
+                self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL,
+                                              text=True)
+                # stop() may have run before the child existed
+                if self._stop.is_set():
+                    self._proc.terminate()
+                for line in self._proc.stdout:
+                    stat = parse_smi_line(line)
+                    if stat is not None:
+                        self._publish(stat)
+                self._proc.wait()
+            except Exception:
+                pass
+            # nvidia-smi exited (driver reload, GPU reset...); retry later
+            self._stop.wait(5)
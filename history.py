@@ -0,0 +1,83 @@
+from array import array
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+# Points kept per series, whatever the window: longer windows average more
+# raw samples into each point instead of growing the buffer
+HISTORY_POINTS = 120
+
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_window(value):
+    """Seconds in a window such as ``90``, ``10m``, ``6h`` or ``2d``."""
+    value = value.strip().lower()
+    scale = WINDOW_UNITS.get(value[-1:])
+    number = value[:-1] if scale else value
+    seconds = float(number) * (scale or 1)
+    if seconds <= 0:
+        raise ValueError(f"window must be positive: {value!r}")
+    return seconds
+
+
+class MetricHistory:
+    """Fixed-size ring buffers for one or more series of float samples.
+
+    All series share one preallocated ``array('f')``, so memory is fixed at
+    construction (``series * points * 4`` bytes) however long the session
+    runs. Samples are averaged ``per_point`` at a time before being stored,
+    which downsamples long windows to the same number of points.
+    """
+
+    def __init__(self, series=1, window=600, interval=1.0,
+                 points=HISTORY_POINTS):
+        self.series = series
+        self.points = max(1, min(points, int(window / interval)))
+        self.per_point = max(1, round(window / interval / self.points))
+        self.version = 0
+        self._values = array('f', bytes(4 * series * self.points))
+        self._sums = array('d', bytes(8 * series))
+        self._pending = 0
+        self._next = 0
+        self._count = 0
+
+    def add(self, values):
+        """Record one sample per series; missing values count as 0."""
+        sums = self._sums
+        for i, value in enumerate(values[:self.series]):
+            sums[i] += value or 0.0
+        self._pending += 1
+        if self._pending < self.per_point:
+            return
+
+        base = self._next
+        for i in range(self.series):
+            self._values[i * self.points + base] = sums[i] / self._pending
+            sums[i] = 0.0
+        self._pending = 0
+        self._next = (base + 1) % self.points
+        self._count = min(self._count + 1, self.points)
+        self.version += 1
+
+    def values(self, index=0):
+        """Stored points of one series, oldest first."""
+        offset = index * self.points
+        start = (self._next - self._count) % self.points
+        return [self._values[offset + (start + i) % self.points]
+                for i in range(self._count)]
+
+    def sparkline(self, index=0, width=24, maximum=100.0):
+        values = self.values(index)
+        if not values:
+            return ""
+        # Average neighbouring points when there are more than columns
+        if len(values) > width:
+            step = len(values) / width
+            values = [
+                sum(values[int(i * step):int((i + 1) * step)])
+                / (int((i + 1) * step) - int(i * step))
+                for i in range(width)]
+        top = len(SPARK_CHARS) - 1
+        return "".join(
+            SPARK_CHARS[max(0, min(top, int(value / maximum * top + 0.5)))]
+            for value in values)
@@ -0,0 +1,400 @@
+import os
+import ssl
+import json
+import time
+import base64
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit, urlencode
+
+from profiling import timings
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Collection paths for the resource names accepted by ``list``/``watch``
+RESOURCE_PATHS = {
+    'jobs': ('/apis/batch/v1', 'jobs', 'Job'),
+    'pods': ('/api/v1', 'pods', 'Pod'),
+    'resourcequota': ('/api/v1', 'resourcequotas', 'ResourceQuota'),
+    # Live usage from metrics-server; listed only, never watched
+    'podmetrics': ('/apis/metrics.k8s.io/v1beta1', 'pods', 'PodMetrics'),
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+class ListingExpired(ApiError):
+    """A paged listing's continue token expired (410 Gone) midway."""
+
+
+class ListingRestarted(Exception):
+    """A backend changed how it lists after yielding some of a listing's pages.
+
+    The caller drops the pages it already merged and lists again from the
+    first page.
+    """
+
+
+def merge_page(grouped, page):
+    """Append one ``{kind: items}`` page to the listing merged so far."""
+    for kind, items in page.items():
+        grouped.setdefault(kind, []).extend(items)
+    return grouped
+
+
+def selector_params(selector=None, field_selector=None):
+    params = {}
+    if selector:
+        params['labelSelector'] = selector
+    if field_selector:
+        params['fieldSelector'] = field_selector
+    return params
+
+
+def collection_path(ns, resource, params=None, prefix=''):
+    """API path of a resource collection; ``ns=None`` is cluster-wide."""
+    group, plural, _ = RESOURCE_PATHS[resource]
+    scope = "" if ns is None else f"/namespaces/{ns}"
+    path = f"{prefix}{group}{scope}/{plural}"
+    if params:
+        path += '?' + urlencode(params)
+    return path
+
+
+def load_kubeconfig():
+    """Return the kubeconfig as a dict with file references inlined.
+
+    PyYAML is used when installed; otherwise kubectl renders the (minified,
+    flattened) config as JSON once at startup.
+    """
+    path = os.environ.get('KUBECONFIG', '').split(os.pathsep)[0]
+    path = path or os.path.expanduser('~/.kube/config')
+    if yaml is not None and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        config['_base_dir'] = os.path.dirname(os.path.abspath(path))
+        return config
+
+    result = subprocess.run(
+        ["kubectl", "config", "view", "--raw", "--minify", "--flatten",
+         "-o", "json"], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ApiError(result.stderr.strip() or "cannot read kubeconfig")
+    return json.loads(result.stdout)
+
+
+def _named(entries, name):
+    for entry in entries or ():
+        if entry.get('name') == name:
+            return entry
+    raise ApiError(f"'{name}' not found in kubeconfig")
+
+
+def _read_data(section, key, base_dir):
+    """Return the bytes of a ``<key>-data`` field or the file ``<key>`` names."""
+    if section.get(f'{key}-data'):
+        return base64.b64decode(section[f'{key}-data'])
+    if section.get(key):
+        with open(os.path.join(base_dir, section[key]), 'rb') as f:
+            return f.read()
+    return None
+
+
+def _load_cert_chain(context, cert, key):
+    # ssl only loads client certificates from files
+    paths = []
+    try:
+        for data in (cert, key):
+            fd, path = tempfile.mkstemp()
+            paths.append(path)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+        context.load_cert_chain(*paths)
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+class ExecCredential:
+    """Runs a kubeconfig ``exec`` auth plugin and caches its credential."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.status = None
+        self.expires = 0
+
+    def get(self, force=False):
+        if self.status is None or force or time.time() >= self.expires:
+            env = dict(os.environ)
+            for item in self.spec.get('env') or ():
+                env[item['name']] = item['value']
+            result = subprocess.run(
+                [self.spec['command']] + list(self.spec.get('args') or ()),
+                capture_output=True, text=True, env=env)
+            if result.returncode != 0:
+                raise ApiError(result.stderr.strip() or "exec plugin failed")
+            self.status = json.loads(result.stdout).get('status', {})
+            self.expires = float('inf')
+            expiry = self.status.get('expirationTimestamp')
+            if expiry:
+                expiry = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
+                # Refresh a little early rather than racing the expiry
+                self.expires = expiry.timestamp() - 30
+        return self.status
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one API server, reused across calls."""
+
+    def __init__(self, server, ssl_context=None, timeout=30, size=4):
+        url = urlsplit(server)
+        self.host = url.hostname
+        self.port = url.port
+        self.secure = url.scheme == 'https'
+        self.prefix = url.path.rstrip('/')
+        self.ssl_context = ssl_context
+        self.timeout = timeout
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def connect(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        if self.secure:
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.connect()
+
+    def release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class ApiWatch:
+    """Iterates watch events from a streaming API response.
+
+    ``resource_version`` follows the events (bookmarks included, which are
+    not yielded), so a stream the server ended can be resumed from it. An
+    ERROR event, typically 410 Gone for a version too old to resume from,
+    raises instead.
+    """
+
+    def __init__(self, conn, response, resource_version=None):
+        self._conn = conn
+        self._response = response
+        self.resource_version = resource_version
+
+    def __iter__(self):
+        try:
+            for line in self._response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                obj = event.get('object') or {}
+                if event.get('type') == 'ERROR':
+                    self.resource_version = None
+                    error = ListingExpired if obj.get('code') == 410 else ApiError
+                    raise error(f"watch: {obj.get('message', 'error event')}")
+                self.resource_version = obj.get('metadata', {}).get(
+                    'resourceVersion', self.resource_version)
+                if event.get('type') != 'BOOKMARK':
+                    yield event
+        finally:
+            self.close()
+
+    def close(self):
+        self._conn.close()
+
+
+class ApiBackend:
+    """Talks to the Kubernetes API server directly over pooled connections.
+
+    Offers the same ``pages``/``list``/``watch``/``close`` interface as
+    ``monitor.KubectlBackend``, without paying for a kubectl process (and its
+    auth plugins) on every call. Lists are requested ``chunk_size`` objects
+    at a time (0 fetches each collection in one response), and ``convert``,
+    if given, is applied to each listed object as its page arrives.
+    """
+
+    # The server ends watches after this many seconds; they are then resumed
+    WATCH_TIMEOUT = 300
+
+    def __init__(self, server, token=None, ssl_context=None, exec_spec=None,
+                 basic_auth=None, chunk_size=500, convert=None):
+        self.pool = ConnectionPool(server, ssl_context=ssl_context)
+        self.chunk_size = chunk_size
+        self.convert = convert
+        self.token = token
+        self.basic_auth = basic_auth
+        self.exec_credential = ExecCredential(exec_spec) if exec_spec else None
+        # resourceVersion of each collection's last complete listing, per thread
+        self._listed = threading.local()
+
+    @classmethod
+    def from_kubeconfig(cls, config=None, context=None, **options):
+        config = config or load_kubeconfig()
+        base_dir = config.get('_base_dir', '')
+        ctx = _named(config.get('contexts'),
+                     context or config.get('current-context'))['context']
+        cluster = _named(config.get('clusters'), ctx['cluster'])['cluster']
+        user = _named(config.get('users'), ctx['user']).get('user') or {}
+
+        ssl_context = None
+        if cluster['server'].startswith('https'):
+            ssl_context = ssl.create_default_context()
+            ca = _read_data(cluster, 'certificate-authority', base_dir)
+            if ca:
+                ssl_context.load_verify_locations(cadata=ca.decode())
+            if cluster.get('insecure-skip-tls-verify'):
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = ssl.CERT_NONE
+            cert = _read_data(user, 'client-certificate', base_dir)
+            key = _read_data(user, 'client-key', base_dir)
+            if cert and key:
+                _load_cert_chain(ssl_context, cert, key)
+
+        token = user.get('token')
+        if not token and user.get('tokenFile'):
+            with open(os.path.join(base_dir, user['tokenFile'])) as f:
+                token = f.read().strip()
+        basic_auth = None
+        if user.get('username'):
+            basic_auth = (user['username'], user.get('password', ''))
+
+        return cls(cluster['server'], token=token, ssl_context=ssl_context,
+                   exec_spec=user.get('exec'), basic_auth=basic_auth,
+                   **options)
+
+    def _headers(self, refresh=False):
+        headers = {'Accept': 'application/json'}
+        token = self.token
+        if self.exec_credential:
+            token = self.exec_credential.get(force=refresh).get('token', token)
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        elif self.basic_auth:
+            raw = ':'.join(self.basic_auth).encode()
+            headers['Authorization'] = "Basic " + base64.b64encode(raw).decode()
+        return headers
+
+    def _path(self, ns, resource, params=None):
+        return collection_path(ns, resource, params, prefix=self.pool.prefix)
+
+    def _list_versions(self):
+        if not hasattr(self._listed, 'versions'):
+            self._listed.versions = {}
+        return self._listed.versions
+
+    def request(self, path):
+        for attempt in range(2):
+            # Idle connections the first stale one was pooled with are likely
+            # closed by the server too, so the retry opens a new connection
+            conn = self.pool.connect() if attempt else self.pool.acquire()
+            try:
+                with timings.stage('api'):
+                    conn.request('GET', path,
+                                 headers=self._headers(refresh=attempt > 0))
+                    response = conn.getresponse()
+                    body = response.read()
+            except (http.client.HTTPException, OSError):
+                # Stale keep-alive connection: retry once
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            self.pool.release(conn)
+            if response.status == 401 and self.exec_credential and not attempt:
+                continue
+            if response.status == 410:
+                raise ListingExpired(f"GET {path}: HTTP 410")
+            if response.status != 200:
+                raise ApiError(f"GET {path}: HTTP {response.status}")
+            with timings.stage('decode'):
+                return json.loads(body)
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        """Yield ``{kind: items}`` one API page at a time (limit/continue)."""
+        for resource in resources.split(','):
+            kind = RESOURCE_PATHS[resource][2]
+            params = selector_params(selector, field_selector)
+            collection = self._path(ns, resource, params)
+            if self.chunk_size:
+                params['limit'] = self.chunk_size
+            while True:
+                data = self.request(self._path(ns, resource, params))
+                items = data.get('items', [])
+                for item in items:
+                    item.setdefault('kind', kind)
+                if self.convert is not None:
+                    items = [self.convert(item) for item in items]
+                yield {kind: items}
+                token = data.get('metadata', {}).get('continue')
+                if not token:
+                    break
+                params['continue'] = token
+            self._list_versions()[collection] = (
+                data.get('metadata', {}).get('resourceVersion'))
+
+    def list(self, ns, resources, selector=None, field_selector=None):
+        grouped = {}
+        for page in self.pages(ns, resources, selector, field_selector):
+            merge_page(grouped, page)
+        return grouped
+
+    def watch(self, ns, resource, selector=None, field_selector=None,
+              resource_version=None):
+        """Stream changes to a collection from ``resource_version``.
+
+        By default the watch starts where this thread last listed the same
+        collection, so no change in between is missed and nothing already
+        listed comes back as ADDED.
+        """
+        params = selector_params(selector, field_selector)
+        if resource_version is None:
+            resource_version = self._list_versions().get(
+                self._path(ns, resource, params))
+        params.update(watch=1, timeoutSeconds=self.WATCH_TIMEOUT,
+                      allowWatchBookmarks='true')
+        if resource_version:
+            params['resourceVersion'] = resource_version
+        # Watches hold their connection open, so they bypass the pool. The
+        # server ends them after WATCH_TIMEOUT; a socket silent for longer
+        # than that is dead.
+        conn = self.pool.connect(timeout=self.WATCH_TIMEOUT + self.pool.timeout)
+        try:
+            conn.request('GET', self._path(ns, resource, params),
+                         headers=self._headers())
+            response = conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+        if response.status != 200:
+            conn.close()
+            raise ApiError(f"watch {resource}: HTTP {response.status}")
+        return ApiWatch(conn, response, resource_version)
+
+    def close(self):
+        self.pool.close()
@@ -1,6 +1,11 @@
 from datetime import datetime, timedelta, timezone
+import time
 import random
 import string
+import threading
+from itertools import islice
+
+from kube_api import merge_page
 
 
 def _time_ago(now, hours=0, minutes=0):
@@ -8,6 +13,10 @@ def _time_ago(now, hours=0, minutes=0):
     return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
+def _timestamp(epoch):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
 def _generate_jobs_data(now):
     jobs_data = [
         # Running jobs
@@ -217,7 +226,8 @@ def _build_jobs_items(jobs_data):
     jobs_items = []
     for job_info in jobs_data:
         job = {
-            "metadata": {"name": job_info["name"]},
+            "metadata": {"name": job_info["name"],
+                         "uid": f"mock-job-{job_info['name']}"},
             "status": {
                 "active": job_info["active"],
                 "succeeded": job_info["succeeded"],
@@ -237,13 +247,49 @@ def _build_jobs_items(jobs_data):
         }
 
         if "completionTime" in job_info:
-            job["status"]["completionTime"] = job_info["completionTime"]
+            # Like the API server: failed jobs only get a Failed condition
+            if job_info["failed"]:
+                job["status"]["conditions"] = [
+                    _failed_condition(job_info["completionTime"])]
+            else:
+                job["status"]["completionTime"] = job_info["completionTime"]
 
         jobs_items.append(job)
 
     return jobs_items
 
 
+# GPUs requested per pod; some jobs are CPU-only
+_GPU_COUNTS = (0, 1, 1, 1, 2, 2, 4, 8)
+
+
+def _pod_spec(gpus):
+    requests = {"cpu": "4", "memory": "16Gi"}
+    if gpus:
+        requests["nvidia.com/gpu"] = str(gpus)
+    return {"containers": [{"name": "main",
+                            "resources": {"requests": requests}}]}
+
+
+def _pod_metrics(pod, rng):
+    """Usage of a running mock pod; some pods always sit idle."""
+    idle = random.Random(pod["metadata"]["name"]).random() < 0.15
+    cpu = rng.uniform(0.001, 0.02) if idle else rng.uniform(0.5, 3.9)
+    memory = rng.uniform(0.2, 15.5) * 2 ** 30
+    return {
+        "kind": "PodMetrics",
+        "metadata": {key: pod["metadata"][key] for key in (
+            "name", "namespace", "labels") if key in pod["metadata"]},
+        "containers": [{"name": "main", "usage": {
+            "cpu": f"{int(cpu * 1000)}m", "memory": f"{int(memory / 2 ** 10)}Ki"}}],
+    }
+
+
+def _failed_condition(timestamp):
+    return {"type": "Failed", "status": "True",
+            "reason": "BackoffLimitExceeded", "lastTransitionTime": timestamp}
+
+
 def _generate_pod_suffix():
     # random suffix like "5k9w2"
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=5))
@@ -263,11 +309,15 @@ def _generate_pods_items(jobs_data):
         else:
             phase = "Failed"
 
+        gpus = random.choice(_GPU_COUNTS)
         for _ in range(num_pods):
+            name = f"{job_info['name']}-{_generate_pod_suffix()}"
             pods_items.append({
                 "metadata": {
-                    "name": f"{job_info['name']}-{_generate_pod_suffix()}"
+                    "name": name,
+                    "uid": f"mock-pod-{name}",
                 },
+                "spec": _pod_spec(gpus),
                 "status": {
                     "phase": phase
                 }
@@ -312,3 +362,336 @@ def generate_mock_data():
             "items": pods_items
         }
     }
+
+
+# Synthetic datasets -------------------------------------------------------
+
+_USERS = ["alice", "bob", "carol", "david", "emily", "frank", "grace", "henry",
+          "iris", "jack", "karen", "leo", "maria", "nancy", "oscar", "peter"]
+_FRAMEWORKS = ["pytorch:2.1", "tensorflow:2.14", "jax:0.4", "horovod:0.28",
+               "deepspeed:0.12", "spark:3.5", "sklearn:1.3", "triton:23.10"]
+_PREFIXES = ["train", "eval", "finetune", "preprocess", "infer", "sweep",
+             "export", "distill"]
+_MODELS = ["bert", "resnet", "llama", "vit", "whisper", "unet", "gpt2", "t5"]
+
+# (share, start offset range, duration range, fails) in seconds relative to
+# the moment the mock cluster was created. The "churn" share starts and
+# finishes during a session so incremental code paths see real transitions.
+_PROFILES = [
+    (0.30, (-36000, -600), (40000, 172800), False),   # long running
+    (0.35, (-50400, -3600), (300, 3000), False),      # completed
+    (0.15, (-50400, -3600), (60, 1800), True),        # failed
+    (0.20, (-600, 600), (60, 480), None),             # churn
+]
+
+
+class MockCluster:
+    """Deterministic, lazily generated jobs, pods and quota of any size.
+
+    Every job is derived from ``(seed, index)`` alone, so items can be
+    streamed one at a time and 100k-pod datasets are never held in memory
+    unless a caller materializes them. Each job follows a fixed schedule
+    relative to the cluster's creation time, so successive snapshots show jobs
+    starting, finishing and failing.
+    """
+
+    def __init__(self, jobs=30, pods_per_job=None, seed=None, namespace="mock"):
+        self.num_jobs = jobs
+        self.pods_per_job = pods_per_job
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.namespace = namespace
+        self.epoch = time.time()
+
+    def _rng(self, index):
+        return random.Random(self.seed * 1000003 + index)
+
+    def job_name(self, index):
+        rng = self._rng(index)
+        if index % 10 == 1:
+            # "train-bert-0" vs "train-bert-0-v2": exercises name collisions
+            return self.job_name(index - 1) + "-v2"
+        return f"{rng.choice(_PREFIXES)}-{rng.choice(_MODELS)}-{index}"
+
+    def job_info(self, index, now):
+        rng = self._rng(index)
+        pick = rng.random()
+        for share, starts, durations, fails in _PROFILES:
+            if pick < share:
+                break
+            pick -= share
+        start = self.epoch + rng.uniform(*starts)
+        duration = rng.uniform(*durations)
+        if fails is None:
+            fails = rng.random() < 0.15
+
+        info = {
+            "index": index,
+            "name": self.job_name(index),
+            "uid": f"mock-job-{self.seed}-{index}",
+            "image": f"{rng.choice(_USERS)}/{rng.choice(_FRAMEWORKS)}",
+            "active": 0, "succeeded": 0, "failed": 0,
+            "pods": self.pods_per_job or rng.choice((1, 1, 1, 2, 2, 3)),
+        }
+        if now < start:
+            info["phase"] = "Pending"
+            return info
+
+        info["startTime"] = _timestamp(start)
+        if now < start + duration:
+            info["active"] = 1
+            info["phase"] = "Running"
+        else:
+            info["failedTime" if fails else "completionTime"] = _timestamp(
+                start + duration)
+            info["failed" if fails else "succeeded"] = 1
+            info["phase"] = "Failed" if fails else "Succeeded"
+        return info
+
+    def iter_job_infos(self, now=None):
+        now = time.time() if now is None else now
+        for index in range(self.num_jobs):
+            yield self.job_info(index, now)
+
+    def iter_jobs(self, now=None):
+        for info in self.iter_job_infos(now):
+            status = {key: info[key] for key in (
+                "active", "succeeded", "failed", "startTime", "completionTime")
+                if key in info}
+            if "failedTime" in info:
+                status["conditions"] = [_failed_condition(info["failedTime"])]
+            yield {
+                "kind": "Job",
+                "metadata": {"name": info["name"], "uid": info["uid"],
+                             "namespace": self.namespace,
+                             "labels": {"user": info["image"].split("/")[0]}},
+                "status": status,
+                "spec": {
+                    "completions": 1,
+                    "template": {"spec": {"containers": [
+                        {"image": info["image"]}]}},
+                },
+            }
+
+    def iter_pods(self, now=None):
+        for info in self.iter_job_infos(now):
+            if "startTime" not in info:
+                continue
+            rng = self._rng(info["index"])
+            for i in range(info["pods"]):
+                suffix = ''.join(rng.choices(
+                    string.ascii_lowercase + string.digits, k=5))
+                # Earlier pods of a running job are failed retries
+                phase = info["phase"]
+                if phase == "Running" and i < info["pods"] - 1:
+                    phase = "Failed"
+                metadata = {
+                    "name": f"{info['name']}-{suffix}",
+                    "uid": f"{info['uid']}-pod-{i}",
+                    "namespace": self.namespace,
+                }
+                # Leave some pods unlabelled to exercise the name fallback
+                if info["index"] % 10 != 3:
+                    metadata["labels"] = {"job-name": info["name"],
+                                          "user": info["image"].split("/")[0]}
+                    metadata["ownerReferences"] = [
+                        {"kind": "Job", "name": info["name"], "uid": info["uid"]}]
+                yield {"kind": "Pod", "metadata": metadata,
+                       "spec": _pod_spec(_GPU_COUNTS[info["index"] % 8]),
+                       "status": {"phase": phase}}
+
+    def iter_pod_metrics(self, now=None):
+        now = time.time() if now is None else now
+        # Usage drifts every 15s, like metrics-server's scrape interval
+        window = int(now // 15)
+        for pod in self.iter_pods(now):
+            if pod["status"]["phase"] == "Running":
+                rng = random.Random(f"{pod['metadata']['uid']}-{window}")
+                yield _pod_metrics(pod, rng)
+
+    def quota(self, now=None):
+        running = sum(info["active"] for info in self.iter_job_infos(now))
+        limit = max(4, (running * 5 + 3) // 4)
+        return {
+            "kind": "ResourceQuota",
+            "metadata": {"name": "mock-quota", "namespace": self.namespace},
+            "status": {
+                "hard": {"requests.cpu": str(limit * 4),
+                         "requests.memory": f"{limit * 16}Gi",
+                         "requests.nvidia.com/gpu": str(limit)},
+                "used": {"requests.cpu": str(running * 4),
+                         "requests.memory": f"{running * 16}Gi",
+                         "requests.nvidia.com/gpu": str(running)},
+            },
+        }
+
+
+# Field selectors the API server supports, and where the mock finds them
+_SELECTOR_FIELDS = {
+    'metadata.name': lambda obj: obj['metadata'].get('name'),
+    'metadata.namespace': lambda obj: obj['metadata'].get('namespace'),
+    'status.successful': lambda obj: str(obj['status'].get('succeeded', 0)),
+    'status.phase': lambda obj: obj['status'].get('phase'),
+}
+
+
+def _requirements(selector):
+    """Parse ``a=b,c!=d,e,!f`` into ``(key, operator, value)`` terms."""
+    for term in selector.split(','):
+        term = term.strip()
+        for operator in ('!=', '==', '='):
+            if operator in term:
+                key, value = term.split(operator, 1)
+                yield key.strip(), operator, value.strip()
+                break
+        else:
+            if term.startswith('!'):
+                yield term[1:], '!', None
+            elif term:
+                yield term, 'exists', None
+
+
+def _matches(values, selector):
+    for key, operator, value in _requirements(selector):
+        if operator == 'exists':
+            ok = key in values
+        elif operator == '!':
+            ok = key not in values
+        elif operator == '!=':
+            ok = values.get(key) != value
+        else:
+            ok = values.get(key) == value
+        if not ok:
+            return False
+    return True
+
+
+def _selected(obj, selector=None, field_selector=None):
+    """Whether the API server would list ``obj`` for these selectors."""
+    if selector and not _matches(obj['metadata'].get('labels') or {},
+                                 selector):
+        return False
+    if field_selector:
+        fields = {}
+        for key, _, _ in _requirements(field_selector):
+            if key not in _SELECTOR_FIELDS:
+                raise ValueError(f'field label not supported: "{key}"')
+            fields[key] = _SELECTOR_FIELDS[key](obj)
+        return _matches(fields, field_selector)
+    return True
+
+
+class MockBackend:
+    """Serves mock data through the same interface as the real backends.
+
+    Without ``cluster`` the classic hand-written dataset is served unchanged;
+    with a ``MockCluster`` every call sees the cluster as of the current time,
+    streamed ``chunk_size`` objects per page like a paginated API list. Label
+    and field selectors filter the objects as the API server would.
+    """
+
+    def __init__(self, cluster=None, chunk_size=500):
+        self.cluster = cluster
+        self.chunk_size = chunk_size
+        self._static = None if cluster else generate_mock_data()
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        def select(items):
+            if not (selector or field_selector):
+                return items
+            return (item for item in items
+                    if _selected(item, selector, field_selector))
+
+        for resource in resources.split(','):
+            if self.cluster is None:
+                yield {kind: list(select(items)) for kind, items
+                       in self._static_items(resource).items()}
+            elif resource == 'jobs':
+                yield from self._chunks('Job', select(self.cluster.iter_jobs()))
+            elif resource == 'pods':
+                yield from self._chunks('Pod', select(self.cluster.iter_pods()))
+            elif resource == 'podmetrics':
+                yield from self._chunks(
+                    'PodMetrics', select(self.cluster.iter_pod_metrics()))
+            else:
+                yield {'ResourceQuota': list(select([self.cluster.quota()]))}
+
+    def _chunks(self, kind, items):
+        while True:
+            page = list(islice(items, self.chunk_size or None))
+            if not page:
+                break
+            yield {kind: page}
+
+    def list(self, ns, resources, selector=None, field_selector=None):
+        grouped = {}
+        for page in self.pages(ns, resources, selector, field_selector):
+            merge_page(grouped, page)
+        return grouped
+
+    def _static_items(self, resource):
+        if resource == 'jobs':
+            return {'Job': self._static['jobs']['items']}
+        if resource == 'pods':
+            return {'Pod': self._static['pods']['items']}
+        if resource == 'podmetrics':
+            return {'PodMetrics': [
+                _pod_metrics(pod, random) for pod in self._static['pods']['items']
+                if pod['status']['phase'] == 'Running']}
+        quota = self._static['quota']
+        hard = {'requests.cpu': str(quota['cpu']['limit']),
+                'requests.memory': f"{quota['mem']['limit']}Gi",
+                'requests.nvidia.com/gpu': str(quota['gpu']['limit'])}
+        used = {'requests.cpu': str(quota['cpu']['used']),
+                'requests.memory': f"{quota['mem']['used']}Gi",
+                'requests.nvidia.com/gpu': str(quota['gpu']['used'])}
+        return {'ResourceQuota': [{'status': {'hard': hard, 'used': used}}]}
+
+    def watch(self, ns, resource, selector=None, field_selector=None,
+              resource_version=None):
+        return MockWatch(self, ns, resource, selector, field_selector)
+
+    def close(self):
+        pass
+
+
+class MockWatch:
+    """Watch events derived by diffing successive listings of a resource.
+
+    The first listing, taken when the watch opens, is the baseline (like a
+    watch started from the resourceVersion of a fresh list); every
+    ``interval`` seconds the resource is listed again and the differences
+    are yielded as ADDED, MODIFIED and DELETED events, keyed by UID.
+    """
+
+    # Nothing to resume from: an ended watch is re-listed
+    resource_version = None
+
+    def __init__(self, backend, ns, resource, selector=None,
+                 field_selector=None, interval=1.0):
+        self._backend = backend
+        self._args = (ns, resource, selector, field_selector)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._seen = self._list()
+
+    def _list(self):
+        return {item['metadata']['uid']: item
+                for items in self._backend.list(*self._args).values()
+                for item in items}
+
+    def __iter__(self):
+        while not self._stop.wait(self.interval):
+            current = self._list()
+            for uid, obj in current.items():
+                previous = self._seen.get(uid)
+                if previous is None:
+                    yield {'type': 'ADDED', 'object': obj}
+                elif previous != obj:
+                    yield {'type': 'MODIFIED', 'object': obj}
+            for uid, obj in self._seen.items():
+                if uid not in current:
+                    yield {'type': 'DELETED', 'object': obj}
+            self._seen = current
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,98 @@
+from enum import Enum
+
+
+class JobStatus(Enum):
+    RUNNING = 'Running'
+    COMPLETED = 'Completed'
+    FAILED = 'Failed'
+    PENDING = 'Pending'
+
+
+class PodPhase(Enum):
+    PENDING = 'Pending'
+    RUNNING = 'Running'
+    SUCCEEDED = 'Succeeded'
+    FAILED = 'Failed'
+    UNKNOWN = 'Unknown'
+
+    @classmethod
+    def parse(cls, value):
+        try:
+            return cls(value)
+        except ValueError:
+            return cls.UNKNOWN
+
+
+class Pod:
+    """One pod of a job; ``gpus`` is the number of GPUs its spec requests."""
+
+    __slots__ = ('name', 'phase', 'gpus')
+
+    def __init__(self, name, phase, gpus=0):
+        self.name = name
+        self.phase = phase
+        self.gpus = gpus
+
+    def to_dict(self):
+        return {'name': self.name, 'phase': self.phase.value, 'gpus': self.gpus}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], PodPhase.parse(data['phase']),
+                   data.get('gpus', 0))
+
+
+class Job:
+    """One job of a snapshot, shared by the fetcher and the renderer.
+
+    Timestamps are epoch seconds (``None`` when unset); durations and colours
+    are derived from them only when a row is actually drawn.
+    """
+
+    __slots__ = ('name', 'namespace', 'status', 'user', 'succeeded',
+                 'completions', 'start', 'end', 'pods')
+
+    def __init__(self, name, namespace, status, user, succeeded, completions,
+                 start, end, pods):
+        self.name = name
+        self.namespace = namespace
+        self.status = status
+        self.user = user
+        self.succeeded = succeeded
+        self.completions = completions
+        self.start = start
+        self.end = end
+        self.pods = pods
+
+    def duration(self, now):
+        """Seconds the job has run (so far while running).
+
+        ``None`` if it never started, or finished at an unknown time.
+        """
+        if self.start is None:
+            return None
+        if self.end is None:
+            return now - self.start if self.status is JobStatus.RUNNING else None
+        return self.end - self.start
+
+    def to_dict(self, now):
+        return {
+            'name': self.name,
+            'namespace': self.namespace,
+            'status': self.status.value,
+            'user': self.user,
+            'succeeded': self.succeeded,
+            'completions': self.completions,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration(now),
+            'pods': [pod.to_dict() for pod in self.pods],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of ``to_dict``; the derived ``duration`` is ignored."""
+        return cls(data['name'], data['namespace'], JobStatus(data['status']),
+                   data['user'], data['succeeded'], data['completions'],
+                   data['start'], data['end'],
+                   tuple(Pod.from_dict(pod) for pod in data['pods']))
@@ -1,12 +1,24 @@
+import os
 import sys
 import json
 import time
 import subprocess
 import argparse
+import glob
+import heapq
+import bisect
+import functools
 import platform
+import threading
+import queue
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from collections import namedtuple
 
 if platform.system() != "Windows":
-    import select
+    from selectors import DefaultSelector, EVENT_READ
+    import signal
     import tty
     import termios
 else:
@@ -18,8 +30,20 @@ from rich.layout import Layout
 from rich.panel import Panel
 from rich.table import Table
 from rich.console import Console
+from rich.segment import Segment
+from rich.style import Style
 from rich import box
-from mock_data import generate_mock_data
+from mock_data import MockBackend, MockCluster
+from gpu_sampler import GpuSampler
+from profiling import ThreadedProfile, timings, format_summary
+from history import MetricHistory, SPARK_CHARS, parse_window
+from scheduler import AdaptiveInterval
+from snapshot_cache import SnapshotCache, current_context
+from recording import RecordingBackend, ReplayBackend, session_namespaces
+from pod_usage import PodUsageSampler
+from kube_api import (RESOURCE_PATHS, ListingExpired, ListingRestarted,
+                      collection_path, merge_page, selector_params)
+from models import Job, JobStatus, Pod, PodPhase
 from version import __version__
 
 
@@ -43,149 +67,907 @@ def format_duration(total_seconds):
         return f"{weeks}w {days}d" if days > 0 else f"{weeks}w"
 
 
-def run_cmd(cmd):
-    try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return result.stdout.strip()
-    except Exception:
-        return ""
+# ``stale`` marks a snapshot restored from the on-disk cache, ``partial`` one
+# published while the first listing is still paging in
+Snapshot = namedtuple('Snapshot',
+                      ['quota', 'jobs', 'fetched_at', 'stale', 'partial'],
+                      defaults=(False,))
+
+
+def snapshot_to_cache(snapshot):
+    return {
+        'fetched_at': snapshot.fetched_at,
+        'quota': snapshot.quota,
+        'jobs': [job.to_dict(snapshot.fetched_at) for job in snapshot.jobs],
+    }
+
+
+def save_snapshot(cache, key, snapshot):
+    cache.save(*key, snapshot_to_cache(snapshot))
 
 
-def get_quota(ns, use_mock=False, mock_data=None):
-    if use_mock and mock_data:
-        return mock_data['quota']
+def snapshot_from_cache(record):
+    try:
+        jobs = tuple(Job.from_dict(job) for job in record['jobs'])
+        return Snapshot(record['quota'], jobs, record['fetched_at'], True)
+    except (KeyError, TypeError, ValueError):
+        return None
+
 
-    output = run_cmd(f"kubectl -n {ns} describe resourcequota")
-    data = {
+def empty_quota():
+    return {
         'cpu': {'used': 0, 'limit': 0, 'str': '0/0'},
         'mem': {'used': 0, 'limit': 0, 'str': '0/0'},
         'gpu': {'used': 0, 'limit': 0, 'str': '0/0'}
     }
 
-    lines = output.split('\n')
-    in_table = False
-    for line in lines:
-        if line.strip().startswith('Resource'):
-            in_table = True
-            continue
-        if in_table and line.strip().startswith('----'):
-            continue
-        if in_table and not line.strip():
-            break
-
-        if in_table:
-            parts = line.split()
-            if len(parts) >= 3:
-                res = parts[0]
-                used = parts[1]
-                limit = parts[2]
-
-                if res.startswith('limits.'):
-                    continue
 
-                key = None
-                if res in ['requests.cpu', 'cpu']:
-                    key = 'cpu'
-                elif res in ['requests.memory', 'memory']:
-                    key = 'mem'
-                elif 'gpu' in res:
-                    key = 'gpu'
-
-                if key:
-                    data[key]['str'] = f"{used} / {limit}"
-                    try:
-                        if limit.isdigit() and int(limit) > 0:
-                            data[key]['percent'] = (int(used) / int(limit)) * 100
-                    except:
-                        pass
+QUANTITY_SUFFIXES = {
+    'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30,
+    'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60,
+    'n': 1e-9, 'u': 1e-6, 'm': 1e-3,
+    'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12, 'P': 1e15, 'E': 1e18,
+}
+
+
+def parse_quantity(value):
+    """Convert a Kubernetes quantity such as ``500m`` or ``32Gi`` to a float."""
+    value = str(value).strip()
+    if value[-2:] in QUANTITY_SUFFIXES:
+        return float(value[:-2]) * QUANTITY_SUFFIXES[value[-2:]]
+    if value and value[-1] in QUANTITY_SUFFIXES:
+        return float(value[:-1]) * QUANTITY_SUFFIXES[value[-1]]
+    return float(value)
+
+
+def format_quantity(key, value):
+    if key == 'mem':
+        return f"{round(value / 2 ** 30, 1):g}Gi"
+    return f"{round(value, 2):g}"
+
+
+def quota_key(resource):
+    if resource.startswith('limits.'):
+        return None
+    if resource in ('requests.cpu', 'cpu'):
+        return 'cpu'
+    if resource in ('requests.memory', 'memory'):
+        return 'mem'
+    if 'gpu' in resource:
+        return 'gpu'
+    return None
+
+
+def parse_quota(quotas):
+    """Sum ResourceQuota ``status.hard``/``status.used`` into panel data."""
+    data = empty_quota()
+    found = set()
+    for quota in quotas:
+        status = quota.get('status', {})
+        hard = status.get('hard', {})
+        used = status.get('used', {})
+        for resource, limit in hard.items():
+            key = quota_key(resource)
+            if key is None:
+                continue
+            try:
+                data[key]['limit'] += parse_quantity(limit)
+                data[key]['used'] += parse_quantity(used.get(resource, 0))
+                found.add(key)
+            except ValueError:
+                pass
+
+    return _summarize_quota(data, found)
 
+
+def _summarize_quota(data, keys):
+    for key in keys:
+        entry = data[key]
+        entry['str'] = (f"{format_quantity(key, entry['used'])} / "
+                        f"{format_quantity(key, entry['limit'])}")
+        if entry['limit'] > 0:
+            entry['percent'] = entry['used'] / entry['limit'] * 100
     return data
 
 
-def get_jobs_pods(ns, use_mock=False, mock_data=None):
-    if use_mock and mock_data:
-        jobs = mock_data['jobs']['items']
-        pods = mock_data['pods']['items']
-    else:
-        jobs_json = run_cmd(f"kubectl -n {ns} get jobs -o json")
-        pods_json = run_cmd(f"kubectl -n {ns} get pods -o json")
+def merge_quotas(quotas):
+    """Aggregate the quota panel data of several namespaces."""
+    if len(quotas) == 1:
+        return quotas[0]
+    data = empty_quota()
+    found = set()
+    for quota in quotas:
+        for key, entry in quota.items():
+            if entry.get('limit'):
+                data[key]['used'] += entry['used']
+                data[key]['limit'] += entry['limit']
+                found.add(key)
+    return _summarize_quota(data, found)
+
+
+class KubectlWatch:
+    """Iterates watch events from a ``kubectl get --watch`` child process.
+
+    kubectl lists the objects itself before it watches and replays that
+    listing as ADDED events, with no marker where the replay ends. The first
+    time the stream falls silent for ``SYNC_IDLE`` seconds after its first
+    event (a slow listing is not a pause), a ``SYNCED`` event is yielded in
+    its place. A kubectl that exits with an error (for example a watch that
+    RBAC forbids) raises it with kubectl's message.
+    """
+
+    # kubectl cannot resume a watch, so an ended stream is always re-listed
+    resource_version = None
+    replays_list = True
+    SYNC_IDLE = 1.0
+
+    def __init__(self, cmd):
+        # A file, not a pipe: nobody reads stderr until kubectl has exited
+        self._stderr = tempfile.TemporaryFile(mode='w+')
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                      stderr=self._stderr, text=True)
+        self._closed = False
+        self._documents = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        # Each event is a pretty-printed JSON document whose closing brace sits
+        # alone in column 0, so documents can be split without re-scanning.
+        buf = []
+        try:
+            for line in self._proc.stdout:
+                buf.append(line)
+                if line.rstrip('\n') == '}':
+                    self._documents.put(''.join(buf))
+                    buf = []
+        finally:
+            self._documents.put(None)
+
+    def __iter__(self):
+        started = synced = False
+        try:
+            while True:
+                try:
+                    document = self._documents.get(
+                        timeout=self.SYNC_IDLE if started and not synced
+                        else None)
+                except queue.Empty:
+                    synced = True
+                    yield {'type': 'SYNCED'}
+                    continue
+                started = True
+                if document is None:
+                    break
+                try:
+                    event = json.loads(document)
+                except ValueError as e:
+                    # Every later document would be parsed with this one's
+                    # prefix; end the stream so the watcher re-lists
+                    raise ValueError(f"unreadable watch event: {e}")
+                yield event
+            if self._proc.wait() != 0 and not self._closed:
+                self._stderr.seek(0)
+                message = self._stderr.read().strip()
+                raise RuntimeError(message or f"kubectl watch exited with "
+                                   f"status {self._proc.returncode}")
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed = True
+        if self._proc.poll() is None:
+            self._proc.terminate()
+        self._stderr.close()
+
+
+# Only the fields the dashboard reads, one tab-separated row per object.
+# Maps (quota hard/used) are printed as JSON by kubectl's jsonpath printer.
+PROJECTED_FIELDS = (
+    ('kind', '{.kind}'),
+    ('namespace', '{.metadata.namespace}'),
+    ('name', '{.metadata.name}'),
+    ('uid', '{.metadata.uid}'),
+    ('owner', '{.metadata.ownerReferences[?(@.kind=="Job")].name}'),
+    ('job_label', '{.metadata.labels.job-name}'),
+    ('phase', '{.status.phase}'),
+    ('active', '{.status.active}'),
+    ('succeeded', '{.status.succeeded}'),
+    ('failed', '{.status.failed}'),
+    ('completions', '{.spec.completions}'),
+    ('startTime', '{.status.startTime}'),
+    ('completionTime', '{.status.completionTime}'),
+    ('failedTime',
+     '{.status.conditions[?(@.type=="Failed")].lastTransitionTime}'),
+    ('image', '{.spec.template.spec.containers[0].image}'),
+    ('hard', '{.status.hard}'),
+    ('used', '{.status.used}'),
+    ('requests', '{.spec.containers[*].resources.requests}'),
+)
+
+PROJECTED_TEMPLATE = ("jsonpath={range .items[*]}"
+                      + '{"\\t"}'.join(path for _, path in PROJECTED_FIELDS)
+                      + '{"\\n"}{end}')
+
+
+class ProjectionError(Exception):
+    """kubectl rejected the projection template or printed unreadable rows."""
+
+
+class ProjectionRowError(ProjectionError):
+    """kubectl printed a projected row the parser cannot read."""
+
+
+# kubectl's messages for a template it cannot evaluate
+TEMPLATE_ERRORS = ('jsonpath', 'template')
+
+
+def _int_fields(row, keys):
+    return {key: int(row[key]) for key in keys if row[key]}
+
+
+def _json_values(text):
+    """Decode the space-separated JSON values a jsonpath ``[*]`` prints."""
+    decoder = json.JSONDecoder()
+    values, index = [], 0
+    while index < len(text):
+        value, index = decoder.raw_decode(text, index)
+        values.append(value)
+        while index < len(text) and text[index] == ' ':
+            index += 1
+    return values
+
+
+def parse_projected_row(line):
+    """Rebuild the minimal object skeleton that build_jobs/parse_quota read."""
+    values = line.split('\t')
+    if len(values) != len(PROJECTED_FIELDS):
+        raise ValueError(f"unexpected projected row: {line!r}")
+    row = dict(zip((key for key, _ in PROJECTED_FIELDS), values))
+
+    metadata = {'name': row['name'], 'namespace': row['namespace']}
+    if row['uid']:
+        metadata['uid'] = row['uid']
+    obj = {'kind': row['kind'], 'metadata': metadata}
+
+    if row['kind'] == 'Job':
+        status = _int_fields(row, ('active', 'succeeded', 'failed'))
+        for key in ('startTime', 'completionTime'):
+            if row[key]:
+                status[key] = row[key]
+        if row['failedTime']:
+            status['conditions'] = [{'type': 'Failed',
+                                     'lastTransitionTime': row['failedTime']}]
+        spec = _int_fields(row, ('completions',))
+        if row['image']:
+            spec['template'] = {'spec': {'containers': [{'image': row['image']}]}}
+        obj.update(status=status, spec=spec)
+    elif row['kind'] == 'Pod':
+        if row['owner']:
+            metadata['ownerReferences'] = [
+                {'kind': 'Job', 'name': row['owner'].split()[0]}]
+        if row['job_label']:
+            metadata['labels'] = {'job-name': row['job_label']}
+        obj['status'] = {'phase': row['phase']}
+        spec = gpu_spec(_json_values(row['requests']))
+        if spec:
+            obj['spec'] = spec
+    elif row['kind'] == 'ResourceQuota':
+        obj['status'] = {'hard': json.loads(row['hard'] or '{}'),
+                         'used': json.loads(row['used'] or '{}')}
+    return obj
+
+
+def parse_top_row(line, ns=None):
+    """Rebuild a PodMetrics skeleton from a ``kubectl top pods`` row."""
+    values = line.split()
+    if ns is None:
+        ns, values = values[0], values[1:]
+    if len(values) < 3:
+        raise ValueError(f"unexpected top row: {line!r}")
+    name, cpu, memory = values[:3]
+    return {'kind': 'PodMetrics',
+            'metadata': {'name': name, 'namespace': ns},
+            'containers': [{'usage': {'cpu': cpu, 'memory': memory}}]}
+
+
+def kubectl_args(ns, selector=None, field_selector=None):
+    args = ["-A"] if ns is None else ["-n", ns]
+    if selector:
+        args += ["-l", selector]
+    if field_selector:
+        args += ["--field-selector", field_selector]
+    return args
+
+
+class KubectlBackend:
+    """Fetches cluster objects by shelling out to kubectl.
+
+    By default only the fields the dashboard needs are requested (a jsonpath
+    projection), which keeps managedFields, pod specs and env vars off the
+    wire. If kubectl rejects the template or its output cannot be parsed, the
+    backend falls back to full objects for the rest of the session (raising
+    ``ListingRestarted`` if projected pages were already yielded); any other
+    kubectl failure (connection, auth, ...) is raised to the caller.
+
+    Lists are produced page by page (``chunk_size`` objects, 0 for a single
+    page): projected rows are parsed as kubectl streams them, full objects are
+    requested with ``kubectl get --raw`` and the API's limit/continue and
+    slimmed to the projected fields as each page arrives. Pod metrics come
+    from ``kubectl top pods`` in one page.
+    """
+
+    def __init__(self, projected=True, chunk_size=500):
+        self.projected = projected
+        self.chunk_size = chunk_size
+        # Set once a projected page arrived: the template is known to work
+        self._projection_works = False
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        """Yield ``{kind: items}`` pages of one listing.
+
+        ``ns=None`` lists across all namespaces. Selectors are passed through
+        to kubectl and so filter every listed kind.
+        """
+        if resources == 'podmetrics':
+            # Kept apart from the fallback below: a cluster without
+            # metrics-server must not cost the projection of everything else
+            yield self._page_top(ns, selector)
+            return
+        if self.projected:
+            yielded = False
+            try:
+                args = kubectl_args(ns, selector, field_selector)
+                for page in self._pages_projected(args, resources):
+                    yielded = self._projection_works = True
+                    yield page
+                return
+            except ProjectionRowError as e:
+                # Rows the template printed in a form this parser cannot read
+                # (Go maps from older kubectl) can come after many good pages
+                self.projected = False
+                if yielded:
+                    raise ListingRestarted(str(e))
+            except ProjectionError:
+                # kubectl itself failed: a template that worked before is
+                # not the problem
+                if yielded or self._projection_works:
+                    raise
+                self.projected = False
+        yield from self._pages_full(ns, resources, selector, field_selector)
+
+    def list(self, ns, resources, selector=None, field_selector=None):
+        """Fetch several resource kinds at once, grouped by kind."""
+        try:
+            return self._list(ns, resources, selector, field_selector)
+        except ListingRestarted:
+            return self._list(ns, resources, selector, field_selector)
+
+    def _list(self, ns, resources, selector=None, field_selector=None):
+        grouped = {}
+        for page in self.pages(ns, resources, selector, field_selector):
+            merge_page(grouped, page)
+        return grouped
+
+    def _pages_projected(self, args, resources):
+        proc = subprocess.Popen(
+            ["kubectl"] + args + ["get", resources,
+                                  f"--chunk-size={self.chunk_size}",
+                                  "-o", PROJECTED_TEMPLATE],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        started = time.perf_counter()
+        decode = 0.0
+        try:
+            page, count = {}, 0
+            for line in proc.stdout:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                start = time.perf_counter()
+                try:
+                    obj = parse_projected_row(line)
+                except ValueError as e:
+                    raise ProjectionRowError(str(e))
+                decode += time.perf_counter() - start
+                page.setdefault(obj['kind'], []).append(obj)
+                count += 1
+                if count == self.chunk_size:
+                    yield page
+                    page, count = {}, 0
+            stderr = proc.stderr.read()
+            if proc.wait() != 0:
+                if any(error in stderr.lower() for error in TEMPLATE_ERRORS):
+                    raise ProjectionError(stderr.strip())
+                raise RuntimeError(stderr.strip())
+            if page:
+                yield page
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+        timings.record('kubectl', time.perf_counter() - started - decode)
+        timings.record('decode', decode)
+
+    def _page_top(self, ns, selector=None):
+        with timings.stage('kubectl'):
+            result = subprocess.run(
+                ["kubectl"] + kubectl_args(ns, selector)
+                + ["top", "pods", "--no-headers"],
+                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        with timings.stage('decode'):
+            return {'PodMetrics': [parse_top_row(line, ns)
+                                   for line in result.stdout.splitlines()
+                                   if line.strip()]}
+
+    def _pages_full(self, ns, resources, selector=None, field_selector=None):
+        for resource in resources.split(','):
+            kind = RESOURCE_PATHS[resource][2]
+            params = selector_params(selector, field_selector)
+            if self.chunk_size:
+                params['limit'] = self.chunk_size
+            while True:
+                with timings.stage('kubectl'):
+                    result = subprocess.run(
+                        ["kubectl", "get", "--raw",
+                         collection_path(ns, resource, params)],
+                        capture_output=True, text=True)
+                if result.returncode != 0:
+                    stderr = result.stderr.strip()
+                    if 'continue' in params and 'expired' in stderr.lower():
+                        raise ListingExpired(stderr)
+                    raise RuntimeError(stderr)
+                try:
+                    with timings.stage('decode'):
+                        data = json.loads(result.stdout)
+                except ValueError as e:
+                    raise RuntimeError(f"unreadable listing: {e}")
+                items = data.get('items', [])
+                for item in items:
+                    item.setdefault('kind', kind)
+                yield {kind: [slim_object(item) for item in items]}
+                token = data.get('metadata', {}).get('continue')
+                if not token:
+                    break
+                params['continue'] = token
+
+    def watch(self, ns, resource, selector=None, field_selector=None,
+              resource_version=None):
+        args = kubectl_args(ns, selector, field_selector)
+        # kubectl has no flag to start from a resourceVersion, and with
+        # --watch-only anything changed between the watcher's listing and
+        # kubectl's own would be lost: --watch replays kubectl's listing,
+        # which the watcher reconciles against its store
+        return KubectlWatch(["kubectl"] + args + [
+            "get", resource, "--watch", "--output-watch-events",
+            "-o", "json"])
+
+    def close(self):
+        pass
+
+
+def make_backend(name, projected=True, chunk_size=500):
+    if name == 'api':
+        from kube_api import ApiBackend
+        return ApiBackend.from_kubeconfig(chunk_size=chunk_size,
+                                          convert=slim_object)
+    return KubectlBackend(projected=projected, chunk_size=chunk_size)
+
+
+class JobFilter:
+    """Narrows which jobs are fetched and shown.
+
+    ``selector`` is pushed down to the backend requests for jobs and pods,
+    ``field_selector`` (which names Job fields such as ``status.successful``)
+    to the jobs request only; ``users`` and ``statuses`` are applied in
+    build_jobs before any per-job work is done.
+    """
 
+    def __init__(self, selector=None, field_selector=None, users=None,
+                 statuses=None):
+        self.selector = selector
+        self.field_selector = field_selector
+        self.users = set(users) if users else None
+        self.statuses = set(statuses) if statuses else None
+
+    def selectors(self, resource):
+        field_selector = self.field_selector if resource == 'jobs' else None
+        return {'selector': self.selector, 'field_selector': field_selector}
+
+    @property
+    def pushdown(self):
+        return bool(self.selector or self.field_selector)
+
+    def listings(self):
+        """``(resources, selectors)`` requests that fetch the jobs and pods."""
+        if self.field_selector:
+            return [('jobs', self.selectors('jobs')),
+                    ('pods', self.selectors('pods'))]
+        return [('jobs,pods', self.selectors('jobs'))]
+
+
+# Live usage of one pod: CPU in cores, memory in bytes
+PodUsage = namedtuple('PodUsage', ['cpu', 'mem'])
+
+
+def parse_pod_metrics(items):
+    """Map ``(namespace, pod)`` to the summed usage of its containers."""
+    usage = {}
+    for item in items:
+        metadata = item.get('metadata', {})
+        cpu = mem = 0.0
+        for container in item.get('containers') or ():
+            values = container.get('usage') or {}
+            try:
+                cpu += parse_quantity(values.get('cpu', 0))
+                mem += parse_quantity(values.get('memory', 0))
+            except ValueError:
+                pass
+        usage[(metadata.get('namespace', ''), metadata.get('name'))] = (
+            PodUsage(cpu, mem))
+    return usage
+
+
+def get_pod_usage(namespaces, backend=None):
+    """Per-pod usage of several namespaces from the metrics API."""
+    backend = backend or KubectlBackend()
+    usage = {}
+    for ns in namespaces:
+        usage.update(parse_pod_metrics(
+            backend.list(ns, 'podmetrics').get('PodMetrics', [])))
+    return usage
+
+
+def slim_object(obj):
+    """Drop everything build_jobs and parse_quota do not read.
+
+    Keeps only the fields of the kubectl projection, so a listing of full
+    objects holds no more memory than a projected one while it pages in.
+    """
+    metadata = obj.get('metadata', {})
+    slim = {key: metadata[key] for key in ('name', 'namespace', 'uid')
+            if key in metadata}
+    if metadata.get('ownerReferences'):
+        slim['ownerReferences'] = [
+            {'kind': owner.get('kind'), 'name': owner.get('name')}
+            for owner in metadata['ownerReferences']]
+    labels = metadata.get('labels') or {}
+    job_labels = {label: labels[label] for label in JOB_NAME_LABELS
+                  if label in labels}
+    if job_labels:
+        slim['labels'] = job_labels
+
+    kind = obj.get('kind')
+    status = obj.get('status', {})
+    result = {'kind': kind, 'metadata': slim}
+    if kind == 'Job':
+        result['status'] = {key: status[key] for key in (
+            'active', 'succeeded', 'failed', 'startTime', 'completionTime')
+            if key in status}
+        failed_time = job_failed_time(status)
+        if failed_time:
+            result['status']['conditions'] = [
+                {'type': 'Failed', 'lastTransitionTime': failed_time}]
+        spec = obj.get('spec', {})
+        result['spec'] = {key: spec[key] for key in ('completions',)
+                          if key in spec}
         try:
-            j = json.loads(jobs_json)
-            jobs = j.get('items', [])
-            p = json.loads(pods_json)
-            pods = p.get('items', [])
-        except Exception:
-            jobs = []
-            pods = []
+            image = spec['template']['spec']['containers'][0]['image']
+            result['spec']['template'] = {
+                'spec': {'containers': [{'image': image}]}}
+        except (KeyError, IndexError, TypeError):
+            pass
+    elif kind == 'Pod':
+        result['status'] = {'phase': status.get('phase')}
+        spec = gpu_spec(container_requests(container) for container
+                        in obj.get('spec', {}).get('containers') or ())
+        if spec:
+            result['spec'] = spec
+    elif kind == 'PodMetrics':
+        result['containers'] = [
+            {'usage': container.get('usage', {})}
+            for container in obj.get('containers') or ()]
+    else:
+        result['status'] = {'hard': status.get('hard', {}),
+                            'used': status.get('used', {})}
+    return result
+
+
+def get_namespace(ns, backend=None, job_filter=None, on_page=None,
+                  with_quota=True, with_jobs=True):
+    """Fetch quota and jobs together with a single backend listing.
+
+    Selectors must not filter the quota, so with a selector the quota is
+    listed by a second call (and with a field selector, jobs and pods are
+    listed apart). Pages are merged as they arrive;
+    ``on_page(ns, grouped)`` sees the objects merged so far after each one.
+    A listing whose continue token expires midway is started over once, as
+    is one that falls back from projected rows to full objects midway.
+    Whatever ``with_quota``/``with_jobs`` leave out is returned as ``None``.
+    """
+    backend = backend or KubectlBackend()
+    pushdown = job_filter is not None and job_filter.pushdown
+    if with_quota and with_jobs and not pushdown:
+        listings = [("jobs,pods,resourcequota", {})]
+    else:
+        listings = []
+        if with_jobs:
+            listings.extend(job_filter.listings() if pushdown
+                            else [("jobs,pods", {})])
+        if with_quota:
+            listings.append(("resourcequota", {}))
+    grouped = {}
+    for resources, selectors in listings:
+        expired = False
+        while True:
+            try:
+                for page in backend.pages(ns, resources, **selectors):
+                    merge_page(grouped, page)
+                    if on_page is not None:
+                        on_page(ns, grouped)
+                break
+            except ListingExpired:
+                if expired:
+                    raise
+                expired = True
+            except ListingRestarted:
+                # Raised once per backend: it no longer projects afterwards
+                pass
+            # The pages already merged are from an outdated listing
+            for resource in resources.split(','):
+                grouped.pop(RESOURCE_PATHS[resource][2], None)
+    quota = jobs = None
+    if with_quota:
+        quota = parse_quota(grouped.get('ResourceQuota', []))
+    if with_jobs:
+        jobs = build_jobs(grouped.get('Job', []), grouped.get('Pod', []),
+                          job_filter)
+    return quota, jobs
+
+
+def get_namespaces(namespaces, backend=None, executor=None, job_filter=None,
+                   on_page=None, with_quota=True, with_jobs=True, last=None):
+    """Fetch several namespaces concurrently and aggregate their quotas.
+
+    Fetches run on ``executor`` (whose worker count bounds the concurrency),
+    so total latency tracks the slowest namespace rather than the sum.
+
+    A namespace whose fetch fails (Forbidden, a mistyped name, ...) does not
+    fail the others: it contributes its entry of ``last``, a dict of each
+    namespace's last good ``(quota, jobs)`` kept up to date here, or nothing.
+    Returns ``(quota, jobs, failed)`` with ``failed`` mapping the failed
+    namespaces to their errors; only if every namespace fails is the first
+    error raised.
+    """
+    def fetch(ns):
+        try:
+            return get_namespace(ns, backend=backend, job_filter=job_filter,
+                                 on_page=on_page, with_quota=with_quota,
+                                 with_jobs=with_jobs)
+        except Exception as e:
+            return e
+
+    if len(namespaces) == 1 or executor is None:
+        results = [fetch(ns) for ns in namespaces]
+    else:
+        results = list(executor.map(fetch, namespaces))
+
+    failed = {ns: result for ns, result in zip(namespaces, results)
+              if isinstance(result, Exception)}
+    if failed and len(failed) == len(namespaces):
+        raise next(iter(failed.values()))
+
+    quotas, jobs = [], []
+    for ns, result in zip(namespaces, results):
+        previous = (last or {}).get(ns, (None, None))
+        if ns in failed:
+            result = previous
+        elif last is not None:
+            last[ns] = (result[0] if with_quota else previous[0],
+                        result[1] if with_jobs else previous[1])
+        ns_quota, ns_jobs = result
+        if ns_quota is not None:
+            quotas.append(ns_quota)
+        if ns_jobs is not None:
+            jobs.extend(ns_jobs)
+
+    quota = merge_quotas(quotas or [empty_quota()]) if with_quota else None
+    return quota, (jobs if with_jobs else None), failed
+
+
+JOB_NAME_LABELS = ('batch.kubernetes.io/job-name', 'job-name')
+
+
+def pod_job_name(pod):
+    metadata = pod.get('metadata', {})
+    for owner in metadata.get('ownerReferences') or ():
+        if owner.get('kind') == 'Job':
+            return owner.get('name')
+    labels = metadata.get('labels') or {}
+    for label in JOB_NAME_LABELS:
+        if label in labels:
+            return labels[label]
+    return None
+
+
+def index_pods_by_job(pods, job_names):
+    """Group pods by owning (namespace, job name) in a single pass.
+
+    Ownership comes from ownerReferences or the job-name labels. Pods carrying
+    neither fall back to the "<job>-<suffix>" naming convention: only the
+    generated suffix (and an indexed job's completion index before it) is
+    stripped, so ``train`` never claims the pods of ``train-v2`` even when
+    ``train-v2`` is not in ``job_names``.
+    """
+    index = {}
+    for pod in pods:
+        ns = pod['metadata'].get('namespace', '')
+        owner = pod_job_name(pod)
+        name = pod['metadata']['name']
+        if owner is None and '-' in name:
+            name = name.rsplit('-', 1)[0]
+            if (ns, name) in job_names:
+                owner = name
+            elif '-' in name and name.rsplit('-', 1)[1].isdigit():
+                name = name.rsplit('-', 1)[0]
+                if (ns, name) in job_names:
+                    owner = name
+        if owner is not None:
+            index.setdefault((ns, owner), []).append(pod)
+    return index
+
+
+def build_jobs(jobs, pods, job_filter=None):
+    with timings.stage('assemble'):
+        return _build_jobs(jobs, pods, job_filter)
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def job_failed_time(status):
+    """When a job failed: its ``Failed`` condition's last transition."""
+    for condition in status.get('conditions') or ():
+        if condition.get('type') == 'Failed':
+            return condition.get('lastTransitionTime')
+    return None
+
+
+# uid -> (start, end raw strings, start epoch, end epoch)
+_TIMESTAMP_CACHE = {}
+TIMESTAMP_CACHE_SIZE = 100000
+
+
+def job_timestamps(job):
+    """Epoch start/end of a job, parsed once per distinct value.
+
+    Kubernetes only sets ``completionTime`` on success, so a failed job ends
+    when its ``Failed`` condition was set. Entries are keyed by UID and
+    validated against the raw strings, so a job only pays for
+    ``fromisoformat`` again when its timestamps actually change (i.e. when it
+    starts or finishes).
+    """
+    status = job.get('status', {})
+    start_raw = status.get('startTime')
+    end_raw = status.get('completionTime') or job_failed_time(status)
+    uid = job['metadata'].get('uid')
+
+    cached = _TIMESTAMP_CACHE.get(uid) if uid else None
+    if cached is not None and cached[0] == start_raw and cached[1] == end_raw:
+        return cached[2], cached[3]
+
+    start = parse_timestamp(start_raw)
+    end = parse_timestamp(end_raw)
+    if uid:
+        if len(_TIMESTAMP_CACHE) >= TIMESTAMP_CACHE_SIZE:
+            _TIMESTAMP_CACHE.clear()
+        _TIMESTAMP_CACHE[uid] = (start_raw, end_raw, start, end)
+    return start, end
+
+
+def job_status(status_obj, spec):
+    active = status_obj.get('active', 0)
+    succeeded = status_obj.get('succeeded', 0)
+    failed = status_obj.get('failed', 0)
+    req = spec.get('completions', 1)
+
+    if succeeded >= req:
+        return JobStatus.COMPLETED
+    elif active > 0:
+        return JobStatus.RUNNING
+    elif failed > 0:
+        return JobStatus.FAILED
+    return JobStatus.PENDING
+
+
+def job_user(spec):
+    try:
+        img = spec['template']['spec']['containers'][0]['image']
+        parts = img.split('/')
+        return parts[0] if len(parts) > 1 else img.split(':')[0]
+    except:
+        return "Unknown"
+
+
+def container_requests(container):
+    return (container.get('resources') or {}).get('requests') or {}
+
+
+def gpu_spec(requests):
+    """Pod spec reduced to the GPU requests (any vendor) of each container.
 
+    ``requests`` holds one requests map per container; ``None`` is returned
+    when no container requests a GPU.
+    """
+    containers = []
+    for container in requests:
+        gpus = {key: value for key, value in container.items() if 'gpu' in key}
+        if gpus:
+            containers.append({'resources': {'requests': gpus}})
+    return {'containers': containers} if containers else None
+
+
+def pod_gpus(pod):
+    total = 0
+    for container in pod.get('spec', {}).get('containers') or ():
+        for key, value in container_requests(container).items():
+            if 'gpu' not in key:
+                continue
+            try:
+                total += int(parse_quantity(value))
+            except ValueError:
+                pass
+    return total
+
+
+def _build_jobs(jobs, pods, job_filter=None):
     jobs_data = []
     try:
+        # Cheap status/user filters run first so rejected jobs cost nothing more
+        selected = []
         for job in jobs:
-            name = job['metadata']['name']
             status_obj = job.get('status', {})
             spec = job.get('spec', {})
+            status = job_status(status_obj, spec)
+            user = job_user(spec)
+            if job_filter is not None:
+                if job_filter.statuses and status not in job_filter.statuses:
+                    continue
+                if job_filter.users and user not in job_filter.users:
+                    continue
+            selected.append((job, status, user))
+
+        # Every listed job claims its pods, so a filtered-out job's pods are
+        # never matched to a selected job by name
+        pods_by_job = index_pods_by_job(
+            pods, {(job['metadata'].get('namespace', ''), job['metadata']['name'])
+                   for job in jobs})
+        for job, status, user in selected:
+            name = job['metadata']['name']
+            namespace = job['metadata'].get('namespace', '')
+            succeeded = job.get('status', {}).get('succeeded', 0)
+            req = job.get('spec', {}).get('completions', 1)
 
-            # Status Logic
-            active = status_obj.get('active', 0)
-            succeeded = status_obj.get('succeeded', 0)
-            failed = status_obj.get('failed', 0)
-            req = spec.get('completions', 1)
-
-            if succeeded >= req:
-                status = 'Completed'
-            elif active > 0:
-                status = 'Running'
-            elif failed > 0:
-                status = 'Failed'
-            else:
-                status = 'Pending'
-
-            # Duration
-            duration = "-"
-            if 'startTime' in status_obj:
-                try:
-                    start_str = status_obj['startTime']
-                    start_str = start_str.replace('Z', '+00:00')
-                    start = datetime.fromisoformat(start_str)
-
-                    end = datetime.now(start.tzinfo)
-                    if 'completionTime' in status_obj:
-                        end_str = status_obj['completionTime'].replace('Z', '+00:00')
-                        end = datetime.fromisoformat(end_str)
-
-                    diff = end - start
-                    total_seconds = diff.total_seconds()
-                    duration = format_duration(total_seconds)
-                    if 'completionTime' not in status_obj:
-                        duration += " (Run)"
-                except Exception:
-                    pass
-
-            # User
-            user = "Unknown"
-            try:
-                img = spec['template']['spec']['containers'][0]['image']
-                parts = img.split('/')
-                user = parts[0] if len(parts) > 1 else img.split(':')[0]
-            except:
-                pass
+            # Timestamps
+            start, end = job_timestamps(job)
 
             # Pods
-            my_pods = []
-            for pod in pods:
-                if pod['metadata']['name'].startswith(name + "-"):
-                    p_status = pod['status']['phase']
-                    my_pods.append(f"{pod['metadata']['name']} ({p_status})")
-
-            jobs_data.append({
-                'name': name,
-                'status': status,
-                'user': user,
-                'completions': f"{succeeded}/{req}",
-                'duration': duration,
-                'pods': my_pods
-            })
+            my_pods = tuple(
+                Pod(pod['metadata']['name'],
+                    PodPhase.parse(pod.get('status', {}).get('phase')),
+                    pod_gpus(pod))
+                for pod in pods_by_job.get((namespace, name), ()))
+
+            jobs_data.append(Job(name, namespace, status, user, succeeded, req,
+                                 start, end, my_pods))
 
     except Exception:
         pass
@@ -193,60 +975,835 @@ def get_jobs_pods(ns, use_mock=False, mock_data=None):
     return jobs_data
 
 
-def get_local_metrics():
+# Seconds between partial snapshots while the first listing pages in
+PARTIAL_INTERVAL = 0.5
+# Least seconds between two writes of the snapshot cache during a session
+CACHE_SAVE_INTERVAL = 60
+
+
+def jobs_fingerprint(jobs):
+    """Hash of everything the table shows, to tell whether a fetch changed it."""
+    return hash(tuple(
+        (job.namespace, job.name, job.status, job.succeeded, job.start,
+         job.end, tuple((pod.name, pod.phase, pod.gpus) for pod in job.pods))
+        for job in jobs))
+
+
+class Refresher:
+    """Fetches cluster data on a background thread.
+
+    The render loop never waits on kubectl: it reads ``snapshot``, which is
+    replaced wholesale with a new immutable ``Snapshot`` whenever a fetch
+    completes. Jobs and quota are polled on their own ``AdaptiveInterval``
+    schedules, so quiet namespaces and slow API servers are polled less;
+    when nothing changed the previous jobs tuple is republished as-is.
+
+    ``save``, if given, is called on this thread with the first complete
+    snapshot and then with changed ones, at most every CACHE_SAVE_INTERVAL
+    seconds, so the on-disk cache survives a session that is killed.
+
+    A namespace that cannot be fetched keeps its last good data in the
+    snapshot and is listed in ``failed`` until it can be fetched again.
+    """
+
+    def __init__(self, namespaces, jobs_interval=2, quota_interval=10,
+                 watch=False, backend=None, max_concurrency=4,
+                 job_filter=None, initial=None, on_update=None, save=None):
+        self.namespaces = namespaces
+        self.on_update = on_update
+        self.save = save
+        self._saved = None
+        self._saved_at = 0
+        self.job_filter = job_filter
+        self.backend = backend or KubectlBackend()
+        self.jobs_schedule = AdaptiveInterval(jobs_interval)
+        self.quota_schedule = AdaptiveInterval(quota_interval)
+        # A stale (cached) snapshot is shown until the first complete fetch
+        self.snapshot = initial
+        self.fetching = False
+        self._quota = None
+        self._jobs = None
+        self._fingerprint = None
+        self._jobs_dirty = True
+        # Last good (quota, jobs) and the failing namespaces, per source
+        self._last = {}
+        self._failed = {'quota': set(), 'jobs': set()}
+        self._partial = {}
+        self._partial_at = 0
+        self._partial_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_concurrency, len(namespaces))))
+        self._watchers = []
+        if watch:
+            self._watchers = [
+                ResourceWatcher(ns, resource, self.backend,
+                                on_change=self._watch_changed,
+                                selectors=(job_filter.selectors(resource)
+                                           if job_filter else None))
+                for ns in namespaces for resource in ('jobs', 'pods')
+            ]
+
+    def start(self):
+        for watcher in self._watchers:
+            watcher.start()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for watcher in self._watchers:
+            watcher.stop()
+        self._executor.shutdown(wait=False)
+
+    def _updated(self):
+        if self.on_update:
+            self.on_update()
+
+    @property
+    def loaded(self):
+        """Whether ``snapshot`` holds a complete live fetch."""
+        return self._quota is not None and self._jobs is not None
+
+    @property
+    def failed(self):
+        """Namespaces whose latest quota or jobs fetch failed."""
+        return sorted(self._failed['quota'] | self._failed['jobs'])
+
+    def _watch_changed(self):
+        self._jobs_dirty = True
+        self._wake.set()
+
+    def _due(self, now):
+        if self._watchers:
+            return self._jobs_dirty, self.quota_schedule.is_due(now)
+        jobs_due = self.jobs_schedule.is_due(now)
+        quota_due = self.quota_schedule.is_due(now)
+        if jobs_due or quota_due:
+            # Take the other source along if it is due shortly anyway, so
+            # both share one listing instead of two calls a moment apart
+            soon = now + self.jobs_schedule.base / 2
+            jobs_due = jobs_due or self.jobs_schedule.is_due(soon)
+            quota_due = quota_due or self.quota_schedule.is_due(soon)
+        return jobs_due, quota_due
+
+    def fetch(self):
+        now = time.time()
+        jobs_due, quota_due = self._due(now)
+        if not (jobs_due or quota_due):
+            return
+        self.fetching = True
+        self._updated()
+        try:
+            with timings.stage('fetch'):
+                self._fetch(now, jobs_due, quota_due)
+        finally:
+            self.fetching = False
+            self._updated()
+
+    def _fetch(self, now, jobs_due, quota_due):
+        sources = [source for due, source in (
+            (jobs_due, 'jobs'), (quota_due, 'quota')) if due]
+        schedules = {'jobs': self.jobs_schedule, 'quota': self.quota_schedule}
+        started = time.perf_counter()
+        try:
+            quota, jobs, failed = self._load(jobs_due, quota_due)
+        except Exception:
+            # A failing call counts as unchanged, so retries back off too
+            for source in sources:
+                schedules[source].done(now, False,
+                                       time.perf_counter() - started)
+                self._failed[source] = set(self.namespaces)
+            raise
+        duration = time.perf_counter() - started
+        for source in sources:
+            if source in failed:
+                self._failed[source] = set(failed[source])
+
+        if quota_due:
+            self.quota_schedule.done(now, quota != self._quota, duration)
+            self._quota = quota
+        if jobs_due and jobs is not None:
+            fingerprint = jobs_fingerprint(jobs)
+            changed = fingerprint != self._fingerprint
+            self.jobs_schedule.done(now, changed, duration)
+            if changed:
+                self._jobs = tuple(jobs)
+                self._fingerprint = fingerprint
+        if self.loaded:
+            self.snapshot = Snapshot(self._quota, self._jobs, now, False)
+            self._save(now)
+
+    def _save(self, now):
+        saved = self._saved
+        if self.save is None or (saved is not None and (
+                now - self._saved_at < CACHE_SAVE_INTERVAL
+                or (saved.jobs is self._jobs and saved.quota == self._quota))):
+            return
+        self._saved, self._saved_at = self.snapshot, now
+        try:
+            self.save(self.snapshot)
+        except Exception:
+            pass
+
+    def _load(self, jobs_due, quota_due):
+        """Return ``(quota, jobs, failed)``, ``failed`` keyed by source."""
+        quota = jobs = None
+        failed = {}
+        if self._watchers:
+            if quota_due:
+                quota, _, errors = get_namespaces(
+                    self.namespaces, backend=self.backend,
+                    executor=self._executor, with_jobs=False,
+                    last=self._last)
+                failed['quota'] = errors
+            if jobs_due:
+                # Cleared first so events arriving mid-build trigger another
+                self._jobs_dirty = False
+                # A failing watcher's namespace shows the objects it last
+                # listed, if any, rather than holding back every other one
+                if all(watcher.ready or watcher.error
+                       for watcher in self._watchers):
+                    items = {'jobs': [], 'pods': []}
+                    for watcher in self._watchers:
+                        items[watcher.resource].extend(watcher.items())
+                    jobs = build_jobs(items['jobs'], items['pods'],
+                                      self.job_filter)
+                failed['jobs'] = {watcher.ns for watcher in self._watchers
+                                  if watcher.error}
+            return quota, jobs, failed
+
+        # Until the first complete listing, also after failed attempts, show
+        # pages as they arrive (unless a complete cached snapshot is already
+        # on screen)
+        on_page = None
+        if not self.loaded and not (self.snapshot and self.snapshot.stale):
+            on_page = self._publish_partial
+        quota, jobs, errors = get_namespaces(
+            self.namespaces, backend=self.backend, executor=self._executor,
+            job_filter=self.job_filter, on_page=on_page,
+            with_quota=quota_due, with_jobs=jobs_due, last=self._last)
+        return quota, jobs, {'quota': errors, 'jobs': errors}
+
+    def _publish_partial(self, ns, grouped):
+        with self._partial_lock:
+            now = time.time()
+            if now - self._partial_at < PARTIAL_INTERVAL:
+                return
+            self._partial_at = now
+            self._partial[ns] = (
+                parse_quota(grouped.get('ResourceQuota', [])),
+                build_jobs(grouped.get('Job', []), grouped.get('Pod', []),
+                           self.job_filter))
+            quota = merge_quotas([quota for quota, _ in self._partial.values()])
+            jobs = tuple(job for _, ns_jobs in self._partial.values()
+                         for job in ns_jobs)
+            self.snapshot = Snapshot(quota, jobs, now, False, True)
+        self._updated()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.fetch()
+            except Exception:
+                pass
+            due = self.quota_schedule.due
+            if not self._watchers:
+                due = min(due, self.jobs_schedule.due)
+            self._wake.wait(max(0, due - time.time()))
+            self._wake.clear()
+            # Let a burst of watch events settle into a single rebuild
+            if self._watchers:
+                self._stop.wait(0.2)
+
+
+def format_age(snapshot, fetching, now=None, failed=()):
+    if snapshot is None:
+        text = "[dim]fetching…[/]"
+        if failed:
+            text += f" [bold red]failed: {', '.join(failed)}[/]"
+        return text
+    age = (now or time.time()) - snapshot.fetched_at
+    age = format_duration(max(0, age))
+    if snapshot.stale:
+        text = f"[bold yellow]cached[/] [dim]from {age} ago[/]"
+    elif snapshot.partial:
+        text = f"[bold yellow]loading…[/] [dim]{len(snapshot.jobs)} jobs so far[/]"
+    else:
+        text = f"[dim]updated {age} ago[/]"
+    if fetching:
+        text += " [dim]· fetching…[/]"
+    if failed:
+        text += f" [bold red]· failed: {', '.join(failed)}[/]"
+    return text
+
+
+# Seconds before a failed watch is retried, doubling up to WATCH_RETRY_FACTOR
+# times that while failures continue
+WATCH_RETRY = 1.0
+WATCH_RETRY_FACTOR = 60
+
+
+class ResourceWatcher:
+    """Mirrors one resource kind of a namespace in memory via a watch stream.
+
+    Objects are listed once, then kept current by applying ADDED/MODIFIED/DELETED
+    events keyed by UID. A stream that ends cleanly is reopened from its last
+    resourceVersion where the backend supports it; otherwise, and after any
+    error, the store is re-listed and a new stream is opened. Retries after
+    consecutive errors back off exponentially.
+
+    A stream that ``replays_list`` (kubectl's) starts with ADDED events for
+    every object at the time it listed, which may be later than the store's
+    listing: they update the store, and at its ``SYNCED`` event the objects
+    the replay did not mention, deleted in between, are dropped.
+    """
+
+    def __init__(self, ns, resource, backend, on_change=None, selectors=None):
+        self.ns = ns
+        self.resource = resource
+        self.backend = backend
+        self.selectors = selectors or {}
+        self.on_change = on_change
+        self.ready = False
+        # The last listing or stream error, until a listing succeeds again
+        self.error = None
+        self._items = {}
+        self._lock = threading.Lock()
+        self._stream = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            stream.close()
+
+    def items(self):
+        with self._lock:
+            return list(self._items.values())
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def _relist(self):
+        items = []
+        grouped = self.backend.list(self.ns, self.resource, **self.selectors)
+        for kind_items in grouped.values():
+            items.extend(kind_items)
+        with self._lock:
+            self._items = {obj['metadata']['uid']: obj for obj in items}
+        self.ready = True
+        self.error = None
+        self._changed()
+
+    def _apply(self, event):
+        obj = event.get('object') or {}
+        uid = obj.get('metadata', {}).get('uid')
+        if not uid:
+            return
+        with self._lock:
+            if event.get('type') == 'DELETED':
+                self._items.pop(uid, None)
+            elif event.get('type') in ('ADDED', 'MODIFIED'):
+                # Events carry full objects; keep only what a listing keeps
+                obj.setdefault('kind', RESOURCE_PATHS[self.resource][2])
+                self._items[uid] = slim_object(obj)
+            else:
+                return
+        self._changed()
+
+    def _sweep(self, replayed):
+        with self._lock:
+            gone = [uid for uid in self._items if uid not in replayed]
+            for uid in gone:
+                del self._items[uid]
+        if gone:
+            self._changed()
+
+    def _run(self):
+        version = None
+        # Consecutive failures double the wait before the next attempt
+        retry = AdaptiveInterval(WATCH_RETRY, max_factor=WATCH_RETRY_FACTOR,
+                                 idle_cycles=2)
+        longest = retry.base * retry.max_factor
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if version is None:
+                    self._relist()
+                self._stream = self.backend.watch(
+                    self.ns, self.resource, resource_version=version,
+                    **self.selectors)
+                replayed = (set() if getattr(self._stream, 'replays_list',
+                                             False) else None)
+                for event in self._stream:
+                    if replayed is not None:
+                        if event.get('type') == 'SYNCED':
+                            self._sweep(replayed)
+                            replayed = None
+                            continue
+                        uid = (event.get('object') or {}).get(
+                            'metadata', {}).get('uid')
+                        replayed.add(uid)
+                    self._apply(event)
+                # A watch the server timed out resumes where it stopped
+                version = self._stream.resource_version
+                if version is not None:
+                    continue
+                retry.done(0, True)
+            except Exception as e:
+                version = None
+                first = self.error is None
+                self.error = e
+                if first:
+                    self._changed()
+                # A stream that ran longer than the longest wait was healthy
+                retry.done(0, time.monotonic() - started >= longest)
+            self._stop.wait(retry.current)
+
+
+LOCAL_INTERVAL = 1.0
+# metrics-server scrapes kubelets about every 15s; polling faster finds nothing
+USAGE_INTERVAL = 15.0
+
+
+def get_local_metrics(gpu_sampler=None):
     # CPU
     cpu_total = psutil.cpu_percent(interval=None)
     cpu_per_core = psutil.cpu_percent(interval=None, percpu=True)
 
     # Mem
     mem = psutil.virtual_memory().percent
-    # GPU (Try nvidia-smi)
-    gpu = "N/A"
-    try:
-        cmd = "nvidia-smi --query-gpu=utilization.gpu --format=csv,noheader"
-        res = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if res.returncode == 0:
-            gpu = res.stdout.strip()
-    except:
-        pass
+    # GPU (cached by the background sampler)
+    gpus = gpu_sampler.read() if gpu_sampler else ()
 
-    return cpu_total, cpu_per_core, mem, gpu
+    return cpu_total, tuple(cpu_per_core), mem, gpus
 
 
-def generate_local_resources(cpu_total, cpu_per_core, mem, gpu):
-    grid = Table.grid(expand=True)
-    grid.add_column()
-    grid.add_column(justify="right")
+def format_gpu(gpu):
+    util = "?" if gpu.util is None else f"{gpu.util:.0f}%"
+    if gpu.mem_used is None or not gpu.mem_total:
+        return util
+    return f"{util}  {gpu.mem_used / 1024:.1f}/{gpu.mem_total / 1024:.1f}Gi"
 
-    # Overview
-    grid.add_row("[bold]Total CPU[/]", f"{cpu_total}%")
-    grid.add_row("[bold]Memory[/]", f"{mem}%")
-    grid.add_row("[bold]GPU[/]", str(gpu))
 
-    # Per Core details
+SPARK_WIDTH = 24
+
+
+def make_histories(window, interval, cores):
+    """Ring buffers behind the panel sparklines, sized once at startup."""
+    return {
+        'cpu': MetricHistory(1, window, interval),
+        'cores': MetricHistory(cores, window, interval),
+        'mem': MetricHistory(1, window, interval),
+        'quota': MetricHistory(3, window, interval),
+    }
+
+
+def record_history(histories, window, interval, local_metrics, quota):
+    cpu_total, cpu_per_core, mem, gpus = local_metrics
+    histories['cpu'].add((cpu_total,))
+    histories['cores'].add(cpu_per_core)
+    histories['mem'].add((mem,))
+    if gpus:
+        # GPUs only show up once the sampler has read them
+        if 'gpu' not in histories:
+            histories['gpu'] = MetricHistory(len(gpus), window, interval)
+        histories['gpu'].add([gpu.util for gpu in gpus])
+    if quota is not None:
+        histories['quota'].add([quota[key].get('percent', 0)
+                                for key in ('cpu', 'mem', 'gpu')])
+
+
+def sparkline(histories, name, index=0):
+    history = (histories or {}).get(name)
+    if history is None:
+        return ""
+    return f"[cyan]{history.sparkline(index, SPARK_WIDTH)}[/]"
+
+
+def load_color(load):
+    return "green" if load < 50 else "yellow" if load < 80 else "red"
+
+
+def core_grid(cells, columns=4):
+    """Markup grid of ``(core index, load)`` cells, ``columns`` per row."""
     cores_grid = Table.grid(expand=True, padding=(0, 1))
-    for _ in range(4):
+    for _ in range(columns):
         cores_grid.add_column(justify="center", ratio=1)
 
     row_cells = []
-    for i, p in enumerate(cpu_per_core):
-        color = "green" if p < 50 else "yellow" if p < 80 else "red"
-        row_cells.append(f"C{i}: [{color}]{p:.0f}%[/]")
-        if len(row_cells) == 4:
+    for i, p in cells:
+        row_cells.append(f"C{i}: [{load_color(p)}]{p:.0f}%[/]")
+        if len(row_cells) == columns:
             cores_grid.add_row(*row_cells)
             row_cells = []
     if row_cells:
-        while len(row_cells) < 4:
+        while len(row_cells) < columns:
             row_cells.append("")
         cores_grid.add_row(*row_cells)
+    return cores_grid
+
+
+def numa_nodes():
+    """CPU ids per NUMA node from sysfs, or ``[]`` where unavailable."""
+    nodes = []
+    for path in sorted(glob.glob('/sys/devices/system/node/node*/cpulist'),
+                       key=lambda p: int(p.split('/')[-2][4:])):
+        try:
+            with open(path) as f:
+                spec = f.read().strip()
+        except OSError:
+            return []
+        cpus = []
+        for part in filter(None, spec.split(',')):
+            first, _, last = part.partition('-')
+            cpus.extend(range(int(first), int(last or first) + 1))
+        nodes.append(cpus)
+    return nodes
+
+
+def core_area(console_size, gpu_count):
+    """Approximate (columns, rows) left for per-core detail in the panel."""
+    width, height = console_size
+    # The left column is 1/4 of the width; the local panel half of its height
+    columns = width // 4 - 8
+    rows = (height - 6) // 2 - 4 - (2 + max(1, gpu_count))
+    return max(1, columns), max(0, rows)
+
+
+# Heatmap glyphs, pre-built per load level so frames allocate no strings
+HEAT_SEGMENTS = [
+    Segment(char, Style(color=load_color(level * 100 / (len(SPARK_CHARS) - 1))))
+    for level, char in enumerate(SPARK_CHARS)]
+
+
+class CoreHeatmap:
+    """One glyph per core, drawn from a preallocated load-level buffer."""
+
+    def __init__(self, cores):
+        self.levels = array('B', bytes(cores))
+        self.width = 1
+
+    def update(self, cpu_per_core, width):
+        top = len(HEAT_SEGMENTS) - 1
+        levels = self.levels
+        for i, load in enumerate(cpu_per_core[:len(levels)]):
+            levels[i] = min(top, int(load * top / 100 + 0.5))
+        self.width = max(1, width)
+
+    def __rich_console__(self, console, options):
+        width = min(self.width, options.max_width)
+        levels = self.levels
+        for start in range(0, len(levels), width):
+            for level in levels[start:start + width]:
+                yield HEAT_SEGMENTS[level]
+            yield Segment.line()
+
+
+class CoreView:
+    """Per-core detail that scales from laptops to many-core hosts.
+
+    Picks the first view that fits the space left in the panel: the classic
+    4-column grid, a heatmap with one glyph per core, one summary row per
+    NUMA node, or finally the busiest cores only.
+    """
+
+    GRID_COLUMNS = 4
+    GRID_CELL = 8
+    TOP_CELL = 10
+    # Label and percentage beside a per-core sparkline, plus the narrowest
+    # sparkline worth drawing
+    SPARK_ROW = 12
+    MIN_SPARK = 4
+
+    def __init__(self, cores, nodes=None):
+        self.heatmap = CoreHeatmap(cores)
+        self.nodes = nodes if nodes is not None else numa_nodes()
+
+    def mode(self, cores, columns, rows, history=None):
+        if (history is not None and cores <= rows
+                and columns >= self.SPARK_ROW + self.MIN_SPARK):
+            return 'sparks'
+        if (-(-cores // self.GRID_COLUMNS) <= rows
+                and columns >= self.GRID_COLUMNS * self.GRID_CELL):
+            return 'grid'
+        if -(-cores // columns) <= rows:
+            return 'heatmap'
+        if 1 < len(self.nodes) <= rows:
+            return 'numa'
+        return 'top'
+
+    def render(self, cpu_per_core, columns, rows, history=None):
+        """Return (renderable, title) for the current loads.
+
+        ``history`` holds one series per core; when every core gets a row of
+        its own, each is drawn with its sparkline.
+        """
+        cores = len(cpu_per_core)
+        mode = self.mode(cores, columns, rows, history)
+        if mode == 'sparks':
+            width = min(SPARK_WIDTH, columns - self.SPARK_ROW)
+            return self._sparks(cpu_per_core, history, width), "Cores"
+        if mode == 'grid':
+            return (core_grid(enumerate(cpu_per_core), self.GRID_COLUMNS),
+                    "Cores")
+        if mode == 'heatmap':
+            self.heatmap.update(cpu_per_core, columns)
+            return self.heatmap, f"Cores ({cores})"
+        if mode == 'numa':
+            return self._numa(cpu_per_core), f"{cores} cores / NUMA"
+
+        per_row = max(1, columns // self.TOP_CELL)
+        count = min(cores, per_row * max(1, rows))
+        busiest = heapq.nlargest(count, range(cores),
+                                 key=cpu_per_core.__getitem__)
+        return (core_grid(((i, cpu_per_core[i]) for i in busiest), per_row),
+                f"Top {count}/{cores} cores")
+
+    def _sparks(self, cpu_per_core, history, width):
+        grid = Table.grid(expand=True, padding=(0, 1))
+        grid.add_column()
+        grid.add_column(justify="right", ratio=1)
+        grid.add_column(justify="right")
+        for i, load in enumerate(cpu_per_core):
+            grid.add_row(f"C{i}", f"[cyan]{history.sparkline(i, width)}[/]",
+                         f"[{load_color(load)}]{load:.0f}%[/]")
+        return grid
+
+    def _numa(self, cpu_per_core):
+        grid = Table.grid(expand=True, padding=(0, 1))
+        grid.add_column()
+        grid.add_column(justify="right", ratio=1)
+        grid.add_column(justify="right")
+        for node, cpus in enumerate(self.nodes):
+            loads = [cpu_per_core[i] for i in cpus if i < len(cpu_per_core)]
+            if not loads:
+                continue
+            avg = sum(loads) / len(loads)
+            peak = max(loads)
+            grid.add_row(f"N{node}·{len(loads)}",
+                         f"[{load_color(avg)}]{avg:.0f}%[/]",
+                         f"max [{load_color(peak)}]{peak:.0f}%[/]")
+        return grid
+
+
+def generate_local_resources(cpu_total, cpu_per_core, mem, gpus, histories=None,
+                             core_view=None, area=None):
+    grid = Table.grid(expand=True, padding=(0, 1))
+    grid.add_column()
+    grid.add_column(justify="right", ratio=1)
+    grid.add_column(justify="right")
+
+    # Overview
+    grid.add_row("[bold]Total CPU[/]", sparkline(histories, 'cpu'),
+                 f"{cpu_total}%")
+    grid.add_row("[bold]Memory[/]", sparkline(histories, 'mem'), f"{mem}%")
+    if not gpus:
+        grid.add_row("[bold]GPU[/]", "", "N/A")
+    for i, gpu in enumerate(gpus):
+        grid.add_row(f"[bold]GPU{gpu.index}[/]", sparkline(histories, 'gpu', i),
+                     format_gpu(gpu))
+
+    # Per Core details
+    if core_view is not None and area is not None:
+        cores, title = core_view.render(cpu_per_core, *area,
+                                        history=(histories or {}).get('cores'))
+    else:
+        cores, title = core_grid(enumerate(cpu_per_core)), "Cores"
 
     layout = Table.grid(expand=True)
     layout.add_row(grid)
-    layout.add_row(Panel(cores_grid, title="Cores", border_style="dim", box=box.SIMPLE))
+    layout.add_row(Panel(cores, title=title, border_style="dim", box=box.SIMPLE))
 
     return Panel(layout, title="Local Machine", border_style="magenta")
 
 
+# Final byte(s) of CSI / SS3 escape sequences for the navigation keys
+ESCAPE_KEYS = {
+    'A': 'up', 'B': 'down',
+    'H': 'home', 'F': 'end',
+    '1~': 'home', '7~': 'home',
+    '4~': 'end', '8~': 'end',
+    '5~': 'pgup', '6~': 'pgdn',
+}
+
+# Scan codes msvcrt.getch returns after a b'\x00' or b'\xe0' prefix byte
+WINDOWS_PREFIXES = (b'\x00', b'\xe0')
+WINDOWS_KEYS = {
+    b'H': 'up', b'P': 'down',
+    b'I': 'pgup', b'Q': 'pgdn',
+    b'G': 'home', b'O': 'end',
+}
+
+
+def parse_keys(text):
+    """Translate raw terminal input into key names, in order."""
+    keys = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        i += 1
+        if char == '\x1b' and text[i:i + 1] in ('[', 'O'):
+            seq = text[i + 1:i + 2]
+            i += 2
+            if seq.isdigit():
+                seq += text[i:i + 1]
+                i += 1
+            key = ESCAPE_KEYS.get(seq)
+            if key:
+                keys.append(key)
+        elif char.lower() in ('q', 'p'):
+            keys.append(char.lower())
+    return keys
+
+
+def parse_windows_keys(data):
+    """Translate ``msvcrt.getch`` bytes into key names, in order.
+
+    A byte is only read as a scan code right after a prefix byte, so plain
+    characters such as ``Q`` or ``H`` are never taken for navigation keys.
+    """
+    keys = []
+    i = 0
+    while i < len(data):
+        byte = data[i:i + 1]
+        i += 1
+        if byte in WINDOWS_PREFIXES:
+            key = WINDOWS_KEYS.get(data[i:i + 1])
+            i += 1
+            if key:
+                keys.append(key)
+        elif byte.lower() in (b'q', b'p'):
+            keys.append(byte.lower().decode())
+    return keys
+
+
+class LoopWaker:
+    """Blocks the render loop until a key press, a notification or a timeout.
+
+    On POSIX one selector waits on stdin and on a self-pipe that ``notify``
+    writes to from any thread (new snapshots, terminal resizes), so an idle
+    monitor sleeps in the kernel until something actually happens. Windows
+    consoles cannot be selected on, so there ``msvcrt.kbhit`` is polled in
+    short sleeps that ``notify`` cuts short.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._windows = platform.system() == "Windows"
+        if self._windows:
+            self._event = threading.Event()
+            return
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+        self._selector = DefaultSelector()
+        self._selector.register(sys.stdin.fileno(), EVENT_READ)
+        self._selector.register(self._read_fd, EVENT_READ)
+
+    def notify(self):
+        if self._windows:
+            self._event.set()
+            return
+        try:
+            os.write(self._write_fd, b'\0')
+        except (BlockingIOError, OSError):
+            # A full pipe already guarantees a wakeup
+            pass
+
+    def wait(self, timeout):
+        """Wait up to ``timeout`` seconds; return the keys pressed meanwhile."""
+        if self._windows:
+            return self._wait_windows(timeout)
+        keys = []
+        for selected, _ in self._selector.select(max(0, timeout)):
+            if selected.fd == self._read_fd:
+                try:
+                    while os.read(self._read_fd, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+            else:
+                # Read the fd directly: sys.stdin would buffer bytes that
+                # the selector can no longer see
+                data = os.read(selected.fd, 1024)
+                keys.extend(parse_keys(data.decode('utf-8', errors='ignore')))
+        return keys
+
+    def _wait_windows(self, timeout):
+        deadline = time.monotonic() + max(0, timeout)
+        while True:
+            data = b''
+            while msvcrt.kbhit():
+                key_input = msvcrt.getch()
+                if key_input in WINDOWS_PREFIXES:  # Arrows, PgUp/PgDn...
+                    # The scan code is already waiting behind its prefix
+                    key_input += msvcrt.getch()
+                data += key_input
+            keys = parse_windows_keys(data)
+            remaining = deadline - time.monotonic()
+            if keys or remaining <= 0:
+                return keys
+            if self._event.wait(min(self.POLL_INTERVAL, remaining)):
+                self._event.clear()
+                return keys
+
+    def close(self):
+        if not self._windows:
+            self._selector.close()
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+
+
+def next_age_change(snapshot, now):
+    """Seconds until the "updated … ago" text next changes."""
+    if snapshot is None:
+        return float('inf')
+    age = max(0, now - snapshot.fetched_at)
+    step = 1 if age < 60 else 60
+    return step - age % step
+
+
+class DirtyRegions:
+    """Tracks the inputs each layout region was last rendered from.
+
+    ``update`` only calls ``render`` (and replaces the region's renderable) when
+    ``key`` differs from the previous call, and reports whether it did.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self._keys = {}
+
+    def update(self, name, key, render):
+        if name in self._keys and self._keys[name] == key:
+            return False
+        self._keys[name] = key
+        self.layout[name].update(render())
+        return True
+
+
+FOOTER_TEXT = "Press 'q' or Ctrl+C to exit, 'p' to toggle profiling"
+
+PROFILE_STAGES = ('fetch', 'kubectl', 'api', 'decode', 'assemble', 'table',
+                  'render')
+
+
+def timed_table(*args, **kwargs):
+    with timings.stage('table'):
+        return generate_table(*args, **kwargs)
+
+
 def make_layout():
     layout = Layout()
     layout.split(
@@ -265,76 +1822,318 @@ def make_layout():
     return layout
 
 
-def generate_table(jobs, offset=0, max_rows=None):
+class JobTableModel:
+    """Flat row index over a snapshot's jobs and their pods.
+
+    Built once per snapshot; ``rows()`` resolves a viewport to (job, pod index)
+    pairs by bisecting the job start offsets, so only visible rows are ever
+    formatted.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.starts = []
+        self.has_running = False
+        total = 0
+        for job in jobs:
+            self.starts.append(total)
+            total += 1 + len(job.pods)
+            if job.status is JobStatus.RUNNING:
+                self.has_running = True
+        self.total_rows = total
+
+    def rows(self, offset, count):
+        if offset >= self.total_rows or count <= 0:
+            return
+        i = bisect.bisect_right(self.starts, offset) - 1
+        pod_index = offset - self.starts[i] - 1
+        while count > 0 and i < len(self.jobs):
+            job = self.jobs[i]
+            while pod_index < len(job.pods) and count > 0:
+                yield job, pod_index
+                pod_index += 1
+                count -= 1
+            i += 1
+            pod_index = -1
+
+
+JOB_STATUS_STYLES = {
+    JobStatus.COMPLETED: "green",
+    JobStatus.FAILED: "red",
+    JobStatus.RUNNING: "yellow",
+    JobStatus.PENDING: "yellow",
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def format_completed_duration(seconds):
+    return format_duration(seconds)
+
+
+def format_job_duration(job, now):
+    seconds = job.duration(now)
+    if seconds is None:
+        return "-"
+    if job.status is JobStatus.RUNNING:
+        return format_duration(max(0, seconds)) + " (Run)"
+    return format_completed_duration(max(0, int(seconds)))
+
+
+# Pods in these phases still hold the GPUs they requested
+GPU_HOLDING_PHASES = (PodPhase.PENDING, PodPhase.RUNNING)
+
+
+def job_usage(job, usage):
+    """Job totals: summed live pod usage (``None`` without metrics), GPUs."""
+    cpu = mem = 0.0
+    found = False
+    gpus = 0
+    for pod in job.pods:
+        if pod.phase in GPU_HOLDING_PHASES:
+            gpus += pod.gpus
+        pod_usage = usage.get((job.namespace, pod.name))
+        if pod_usage is not None:
+            cpu += pod_usage.cpu
+            mem += pod_usage.mem
+            found = True
+    return (PodUsage(cpu, mem) if found else None), gpus
+
+
+def format_bytes(value):
+    if value >= 2 ** 30:
+        return f"{value / 2 ** 30:.1f}Gi"
+    return f"{value / 2 ** 20:.0f}Mi"
+
+
+def format_usage(pod_usage, gpus):
+    if pod_usage is None:
+        cells = ("[dim]-[/]", "[dim]-[/]")
+    else:
+        cells = (f"{pod_usage.cpu:.2f}", format_bytes(pod_usage.mem))
+    return cells + (str(gpus) if gpus else "[dim]-[/]",)
+
+
+def format_job_row(job, now, show_namespace=False, usage=None):
+    status_style = JOB_STATUS_STYLES[job.status]
+    namespace = (job.namespace,) if show_namespace else ()
+    row = namespace + (
+        f"[bold]{job.name}[/]",
+        job.user,
+        f"[{status_style}]{job.status.value}[/]",
+        f"{job.succeeded}/{job.completions}",
+        format_job_duration(job, now)
+    )
+    if usage is not None:
+        row += format_usage(*job_usage(job, usage))
+    return row
+
+
+def format_pod_row(job, pod_index, show_namespace=False, usage=None):
+    pod = job.pods[pod_index]
+
+    is_last = (pod_index == len(job.pods) - 1)
+    prefix = "└── " if is_last else "├── "
+
+    p_status_style = "green" if pod.phase is PodPhase.RUNNING else "dim"
+
+    namespace = ("",) if show_namespace else ()
+    row = namespace + (
+        f"  {prefix}{pod.name}",
+        "",
+        f"[{p_status_style}]{pod.phase.value}[/]",
+        "",
+        ""
+    )
+    if usage is not None:
+        gpus = pod.gpus if pod.phase in GPU_HOLDING_PHASES else 0
+        row += format_usage(usage.get((job.namespace, pod.name)), gpus)
+    return row
+
+
+def generate_table(jobs, offset=0, max_rows=None, show_namespace=False,
+                   usage=None):
+    """Table of jobs and their pods; ``usage`` adds live usage columns."""
     table = Table(box=box.SIMPLE_HEAD, expand=True, show_lines=False)
+    if show_namespace:
+        table.add_column("Namespace", style="blue", no_wrap=True)
     table.add_column("Job / Pod Name", style="cyan", no_wrap=True)
     table.add_column("User", style="magenta")
     table.add_column("Status", justify="center")
     table.add_column("Comp", justify="right")
     table.add_column("Duration", justify="right")
-
-    all_rows = []
-    for job in jobs:
-        if job['status'] == 'Completed':
-            status_style = "green"
-        elif job['status'] == 'Failed':
-            status_style = "red"
+    if usage is not None:
+        table.add_column("CPU", justify="right")
+        table.add_column("Mem", justify="right")
+        table.add_column("GPU", justify="right")
+
+    model = jobs if isinstance(jobs, JobTableModel) else JobTableModel(jobs)
+    count = max_rows if max_rows else model.total_rows
+
+    now = time.time()
+    for job, pod_index in model.rows(offset, count):
+        if pod_index < 0:
+            table.add_row(*format_job_row(job, now, show_namespace, usage))
         else:
-            status_style = "yellow"
-
-        all_rows.append({
-            'type': 'job',
-            'name': f"[bold]{job['name']}[/]",
-            'user': job['user'],
-            'status': f"[{status_style}]{job['status']}[/]",
-            'completions': job['completions'],
-            'duration': job['duration']
-        })
-
-        for i, pod_str in enumerate(job['pods']):
-            p_name = pod_str.split(' (')[0]
-            p_status = pod_str.split(' (')[1].rstrip(')')
-
-            is_last = (i == len(job['pods']) - 1)
-            prefix = "└── " if is_last else "├── "
-
-            p_status_style = "green" if p_status == 'Running' else "dim"
-
-            all_rows.append({
-                'type': 'pod',
-                'name': f"  {prefix}{p_name}",
-                'user': "",
-                'status': f"[{p_status_style}]{p_status}[/]",
-                'completions': "",
-                'duration': ""
-            })
-
-    visible_rows = all_rows[offset:]
-    if max_rows:
-        visible_rows = visible_rows[:max_rows]
-
-    for row in visible_rows:
-        table.add_row(
-            row['name'],
-            row['user'],
-            row['status'],
-            row['completions'],
-            row['duration']
-        )
+            table.add_row(*format_pod_row(job, pod_index, show_namespace,
+                                          usage))
 
     return table
 
 
-def generate_cluster_resources(quota):
-    grid = Table.grid(expand=True)
+def generate_cluster_resources(quota, namespace_count=1, histories=None):
+    grid = Table.grid(expand=True, padding=(0, 1))
     grid.add_column()
+    grid.add_column(justify="right", ratio=1)
     grid.add_column(justify="right")
 
-    grid.add_row("CPU", quota['cpu']['str'])
-    grid.add_row("MEM", quota['mem']['str'])
-    grid.add_row("GPU", quota['gpu']['str'])
+    for index, (label, key) in enumerate(
+            (("CPU", 'cpu'), ("MEM", 'mem'), ("GPU", 'gpu'))):
+        grid.add_row(label, sparkline(histories, 'quota', index),
+                     quota[key]['str'])
+
+    title = "Cluster Quota"
+    if namespace_count is None:
+        title += " (all namespaces)"
+    elif namespace_count > 1:
+        title += f" ({namespace_count} namespaces)"
+    return Panel(grid, title=title, border_style="blue")
+
+
+def usage_record(pod_usage, gpus):
+    record = {'gpus': gpus}
+    if pod_usage is not None:
+        record.update(cpu=pod_usage.cpu, mem=pod_usage.mem)
+    return record
+
+
+def job_record(job, fetched_at, usage=None):
+    record = job.to_dict(fetched_at)
+    if usage is not None:
+        record['usage'] = usage_record(*job_usage(job, usage))
+        for pod, pod_record in zip(job.pods, record['pods']):
+            pod_usage = usage.get((job.namespace, pod.name))
+            if pod_usage is not None:
+                pod_record['usage'] = pod_usage._asdict()
+    return record
+
+
+def snapshot_record(namespaces, quota, jobs, fetched_at, usage=None,
+                    failed=None):
+    record = {
+        'timestamp': datetime.fromtimestamp(fetched_at).astimezone().isoformat(),
+        'namespaces': namespaces,
+        'quota': quota,
+        'jobs': [job_record(job, fetched_at, usage) for job in jobs],
+    }
+    if failed:
+        record['failed'] = {ns: str(error) for ns, error in failed.items()}
+    return record
+
+
+def error_text(error):
+    """An exception's message on one line (kubectl errors span several)."""
+    return ' '.join(str(error).split()) or type(error).__name__
+
 
-    return Panel(grid, title="Cluster Quota", border_style="blue")
+def error_record(namespaces, fetched_at, error):
+    return {
+        'timestamp': datetime.fromtimestamp(fetched_at).astimezone().isoformat(),
+        'namespaces': namespaces,
+        'error': error_text(error),
+    }
+
+
+def run_headless(args, namespaces, backend, job_filter=None):
+    """Print snapshots without the TUI and return the exit status.
+
+    ``--once`` prints a single snapshot as a table (or JSON with ``--json``);
+    ``--ndjson`` streams one compact JSON record per ``--interval``. Neither
+    touches the terminal settings, the Rich layout or local metrics. A fetch
+    that fails ends ``--once`` with a one-line error on stderr and status 1;
+    ``--ndjson`` writes an ``error`` record instead and keeps streaming.
+    """
+    executor = None
+    if len(namespaces) > 1:
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(args.max_concurrency, len(namespaces))))
+    show_namespace = args.all_namespaces or len(namespaces) > 1
+
+    try:
+        while True:
+            started = time.time()
+            try:
+                quota, jobs, failed = get_namespaces(
+                    namespaces, backend=backend, executor=executor,
+                    job_filter=job_filter)
+            except Exception as e:
+                if not args.ndjson:
+                    Console(stderr=True).print(
+                        f"[bold red]Error:[/bold red] {error_text(e)}",
+                        soft_wrap=True)
+                    return 1
+                record = error_record(namespaces, started, e)
+                sys.stdout.write(json.dumps(record, separators=(',', ':')) + "\n")
+                sys.stdout.flush()
+                time.sleep(max(0, args.interval - (time.time() - started)))
+                continue
+            usage = None
+            if args.usage:
+                try:
+                    usage = get_pod_usage(namespaces, backend)
+                except Exception:
+                    usage = {}
+            record = snapshot_record(namespaces, quota, jobs, started, usage,
+                                     failed)
+
+            if args.ndjson:
+                sys.stdout.write(json.dumps(record, separators=(',', ':')) + "\n")
+                sys.stdout.flush()
+            elif args.json:
+                print(json.dumps(record, indent=2))
+            else:
+                console = Console()
+                for ns, error in failed.items():
+                    Console(stderr=True).print(
+                        f"[bold red]Error:[/bold red] {ns}: {error}")
+                console.print(generate_cluster_resources(quota))
+                console.print(generate_table(jobs, show_namespace=show_namespace,
+                                             usage=usage))
+
+            if args.once:
+                return 0
+            time.sleep(max(0, args.interval - (time.time() - started)))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def save_profiles(args, profiler):
+    """Write the ``--cprofile`` stats and ``--profile-out`` percentiles."""
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump(args.cprofile)
+    if args.profile_out:
+        timings.dump(args.profile_out)
+
+
+def positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not number > 0 or number == float('inf'):
+        raise argparse.ArgumentTypeError(
+            f"invalid value '{value}' (must be a positive number)")
+    return number
+
+
+def parse_status(value):
+    try:
+        return JobStatus(value.capitalize())
+    except ValueError:
+        choices = ', '.join(status.value for status in JobStatus)
+        raise argparse.ArgumentTypeError(
+            f"invalid status '{value}' (choose from {choices})")
 
 
 def print_help():
@@ -350,23 +2149,141 @@ def print_help():
     console.print(
         "  [green]kubmonitor[/green] [cyan][[/cyan][dim]NAMESPACE[/dim]"
         "[cyan]][/cyan] [cyan][[/cyan][magenta]--mock[/magenta][cyan]][/cyan] "
+        "[cyan][[/cyan][magenta]--watch[/magenta][cyan]][/cyan] "
         "[cyan][[/cyan][magenta]--help[/magenta][cyan]][/cyan] "
         "[cyan][[/cyan][magenta]--version[/magenta][cyan]][/cyan]\n"
     )
 
     console.print("[bold yellow]Positional Arguments:[/bold yellow]")
-    console.print("  [cyan]NAMESPACE[/cyan]      Kubernetes namespace to monitor.")
+    console.print(
+        "  [cyan]NAMESPACE[/cyan]      Kubernetes namespace(s) to monitor; several "
+        "namespaces are"
+    )
+    console.print("                 fetched concurrently and shown together.")
     console.print(
         "                 [dim]Note: Cannot be used with --mock flag.[/dim]\n"
     )
 
     console.print("[bold yellow]Options:[/bold yellow]")
     console.print("  [magenta]-h, --help[/magenta]     Show this help message.")
+    console.print(
+        "  [magenta]-A, --all-namespaces[/magenta]  Monitor jobs in every "
+        "namespace."
+    )
+    console.print(
+        "  [magenta]--max-concurrency[/magenta] [dim]N[/dim]  Fetch at most N "
+        "namespaces at once (default: 4)."
+    )
     console.print(
         "  [magenta]--mock[/magenta]         Use mock data instead of "
         "querying the actual Kubernetes cluster."
     )
     console.print("                 Useful for testing and development.")
+    console.print(
+        "  [magenta]--mock-jobs[/magenta] [dim]N[/dim]  Synthesize N evolving mock "
+        "jobs instead of the fixed set;"
+    )
+    console.print(
+        "                 tune with [magenta]--mock-pods-per-job[/magenta] "
+        "[dim]M[/dim] and [magenta]--mock-seed[/magenta] [dim]S[/dim]."
+    )
+    console.print(
+        "  [magenta]-w, --watch[/magenta]    Stream job/pod changes with "
+        "kubectl watches instead of"
+    )
+    console.print("                 re-listing the namespace every refresh.")
+    console.print(
+        "  [magenta]--backend[/magenta] [dim]B[/dim]    How to reach the cluster: "
+        "[cyan]kubectl[/cyan] (default) or [cyan]api[/cyan]"
+    )
+    console.print(
+        "                 to talk to the API server directly over pooled "
+        "connections."
+    )
+    console.print(
+        "  [magenta]--full-objects[/magenta] Fetch complete objects instead of "
+        "only the fields shown."
+    )
+    console.print(
+        "  [magenta]--record[/magenta] [dim]FILE[/dim]  Append every fetch result "
+        "to a gzipped log."
+    )
+    console.print(
+        "  [magenta]--replay[/magenta] [dim]FILE[/dim]  Play a recorded log back "
+        "instead of querying the cluster"
+    )
+    console.print(
+        "                 ([magenta]--speed[/magenta] [dim]N[/dim] plays it N "
+        "times faster)."
+    )
+    console.print(
+        "  [magenta]--no-cache[/magenta]     Do not show or save the last "
+        "snapshot from ~/.cache/kubmonitor."
+    )
+    console.print(
+        "  [magenta]--chunk-size[/magenta] [dim]N[/dim]  List N objects per "
+        "request (default: 500, 0 for one request)."
+    )
+    console.print(
+        "  [magenta]-l, --selector[/magenta] [dim]SEL[/dim]  Only fetch jobs and "
+        "pods matching a label selector."
+    )
+    console.print(
+        "  [magenta]--field-selector[/magenta] [dim]SEL[/dim]  Only fetch jobs "
+        "matching a field selector."
+    )
+    console.print(
+        "  [magenta]--user[/magenta] [dim]USER[/dim]    Only show jobs of USER "
+        "(repeatable)."
+    )
+    console.print(
+        "  [magenta]--status[/magenta] [dim]STATUS[/dim]  Only show Running, "
+        "Completed, Failed or Pending jobs (repeatable)."
+    )
+    console.print(
+        "  [magenta]--once[/magenta]         Print one snapshot and exit "
+        "([magenta]--json[/magenta] prints it as JSON and implies it)."
+    )
+    console.print(
+        "  [magenta]--ndjson[/magenta]       Stream one JSON record per refresh "
+        "to stdout; the period"
+    )
+    console.print(
+        "                 is set with [magenta]--interval[/magenta] "
+        "[dim]SECONDS[/dim] (default: 2)."
+    )
+    console.print(
+        "  [magenta]--jobs-interval[/magenta] [dim]SECONDS[/dim]  Poll jobs every "
+        "SECONDS (default: 2)."
+    )
+    console.print(
+        "  [magenta]--quota-interval[/magenta] [dim]SECONDS[/dim]  Poll quota "
+        "every SECONDS (default: 10)."
+    )
+    console.print(
+        "  [magenta]--local-interval[/magenta] [dim]SECONDS[/dim]  Sample local "
+        "CPU, memory and GPU every SECONDS (default: 1)."
+    )
+    console.print(
+        "  [magenta]--usage[/magenta]        Add live CPU, memory and GPU columns "
+        "per pod and job"
+    )
+    console.print(
+        "                 from metrics-server every "
+        "[magenta]--usage-interval[/magenta] [dim]SECONDS[/dim] (15)."
+    )
+    console.print(
+        "  [magenta]--history-window[/magenta] [dim]WINDOW[/dim]  Time covered by "
+        "the sparklines, e.g. 90, 10m, 6h (default: 10m)."
+    )
+    console.print(
+        "  [magenta]--profile-out[/magenta] [dim]FILE[/dim]  Write per-stage latency "
+        "percentiles as JSON on exit."
+    )
+    console.print(
+        "  [magenta]--cprofile[/magenta] [dim]FILE[/dim]  Run the session under "
+        "cProfile and save the stats to FILE."
+    )
     console.print(
         "  [magenta]-V, --version[/magenta]  Show kubmonitor's version "
         "number.\n"
@@ -377,11 +2294,16 @@ def print_help():
     console.print("  [green]kubmonitor[/green]\n")
     console.print("  [dim]# Monitor a specific namespace[/dim]")
     console.print("  [green]kubmonitor[/green] [cyan]my-namespace[/cyan]\n")
+    console.print("  [dim]# Monitor several namespaces at once[/dim]")
+    console.print("  [green]kubmonitor[/green] [cyan]team-a team-b[/cyan]\n")
     console.print("  [dim]# Use mock data for testing (no namespace needed)[/dim]")
     console.print("  [green]kubmonitor[/green] [magenta]--mock[/magenta]\n")
 
     console.print("[bold yellow]Keyboard Shortcuts:[/bold yellow]")
     console.print("  [cyan]↑/↓[/cyan]            Navigate up and down")
+    console.print("  [cyan]PgUp/PgDn[/cyan]      Scroll one page up or down")
+    console.print("  [cyan]Home/End[/cyan]       Jump to the first or last job")
+    console.print("  [cyan]p[/cyan]              Toggle the per-stage latency overlay")
     console.print("  [cyan]q[/cyan]              Quit the application")
     console.print("  [cyan]Ctrl+C[/cyan]         Force exit\n")
 
@@ -397,14 +2319,44 @@ def main():
         sys.exit(0)
 
     parser = argparse.ArgumentParser(prog='kubmonitor', add_help=False)
-    parser.add_argument('namespace', nargs='?', default='default')
+    parser.add_argument('namespaces', nargs='*', metavar='namespace')
+    parser.add_argument('--all-namespaces', '-A', action='store_true')
+    parser.add_argument('--max-concurrency', type=int, default=4)
     parser.add_argument('--mock', action='store_true')
+    parser.add_argument('--mock-jobs', type=int)
+    parser.add_argument('--mock-pods-per-job', type=int)
+    parser.add_argument('--mock-seed', type=int)
+    parser.add_argument('--watch', '-w', action='store_true')
+    parser.add_argument('--backend', choices=['kubectl', 'api'],
+                        default='kubectl')
+    parser.add_argument('--full-objects', action='store_true')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--record')
+    parser.add_argument('--replay')
+    parser.add_argument('--speed', type=positive_float, default=1.0)
+    parser.add_argument('--selector', '-l')
+    parser.add_argument('--field-selector')
+    parser.add_argument('--user', action='append')
+    parser.add_argument('--status', action='append', type=parse_status)
+    parser.add_argument('--once', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--ndjson', action='store_true')
+    parser.add_argument('--interval', type=positive_float, default=2)
+    parser.add_argument('--history-window', type=parse_window, default=600)
+    parser.add_argument('--jobs-interval', type=positive_float, default=2)
+    parser.add_argument('--quota-interval', type=positive_float, default=10)
+    parser.add_argument('--local-interval', type=positive_float, default=LOCAL_INTERVAL)
+    parser.add_argument('--usage', action='store_true')
+    parser.add_argument('--usage-interval', type=positive_float, default=USAGE_INTERVAL)
+    parser.add_argument('--profile-out')
+    parser.add_argument('--cprofile')
     parser.add_argument('--version', '-V', action='version',
                         version=f'kubmonitor {__version__}')
 
     args = parser.parse_args()
 
-    if args.mock and args.namespace != 'default':
+    if args.mock and (args.namespaces or args.all_namespaces):
         console = Console()
         console.print(
             "\n[bold red]Error:[/bold red] Cannot specify a namespace when "
@@ -424,22 +2376,113 @@ def main():
             "   [dim]# Monitor real namespace[/dim]\n"
         )
         sys.exit(1)
+    if args.replay and args.mock:
+        Console().print("[bold red]Error:[/bold red] [magenta]--replay[/magenta]"
+                        " and [magenta]--mock[/magenta] cannot be combined.")
+        sys.exit(1)
+    # A single JSON document only makes sense as a one-shot snapshot
+    if args.json and not args.ndjson:
+        args.once = True
+
+    # A replay shows the recorded namespaces unless told otherwise
+    if args.replay and not (args.namespaces or args.all_namespaces):
+        try:
+            args.namespaces = session_namespaces(args.replay) or []
+        except OSError as e:
+            Console().print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+        if args.namespaces == [None]:
+            args.namespaces, args.all_namespaces = [], True
+
+    # A single None namespace means "all namespaces" to the backends
+    if args.all_namespaces:
+        namespaces = [None]
+        ns_str = "Namespaces: [bold green]all[/]"
+    else:
+        namespaces = list(dict.fromkeys(args.namespaces)) or ['default']
+        label = "Namespaces" if len(namespaces) > 1 else "Namespace"
+        ns_str = f"{label}: [bold green]{', '.join(namespaces)}[/]"
+    show_namespace = args.all_namespaces or len(namespaces) > 1
 
-    mock_data = None
     if args.mock:
-        mock_data = generate_mock_data()
-        if not mock_data:
-            print("Failed to load mock data. Exiting.")
-            return
+        cluster = None
+        if args.mock_jobs is not None:
+            cluster = MockCluster(jobs=args.mock_jobs,
+                                  pods_per_job=args.mock_pods_per_job,
+                                  seed=args.mock_seed)
+        backend = MockBackend(cluster, chunk_size=args.chunk_size)
+    elif args.replay:
+        backend = ReplayBackend(args.replay, speed=args.speed)
+    else:
+        try:
+            backend = make_backend(args.backend,
+                                   projected=not args.full_objects,
+                                   chunk_size=args.chunk_size)
+        except Exception as e:
+            Console().print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+    if args.record:
+        backend = RecordingBackend(backend, args.record, namespaces)
+
+    job_filter = None
+    if args.selector or args.field_selector or args.user or args.status:
+        job_filter = JobFilter(args.selector, args.field_selector, args.user,
+                               args.status)
+
+    profiler = None
+    if args.cprofile:
+        profiler = ThreadedProfile()
+        profiler.enable()
+
+    if args.once or args.ndjson:
+        status = 0
+        try:
+            status = run_headless(args, namespaces, backend, job_filter)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            backend.close()
+            save_profiles(args, profiler)
+        sys.exit(status)
 
     console = Console()
     layout = make_layout()
 
     mode_str = "[bold yellow]MOCK MODE[/]" if args.mock else ""
-    layout["header"].update(Panel(
-        f"Kubernetes Monitor - Namespace: [bold green]{args.namespace}[/] {mode_str}",
-        style="white on blue"))
-    layout["footer"].update(Panel("Press 'q' or Ctrl+C to exit", style="dim"))
+    if args.replay:
+        mode_str = f"[bold yellow]REPLAY ×{args.speed:g}[/]"
+    header_str = f"Kubernetes Monitor - {ns_str} {mode_str}"
+
+    # The last snapshot of this view is shown while the first fetch runs;
+    # filtered views are not cached, since they would be mistaken for full ones
+    cache = cache_key = None
+    if not (args.mock or args.replay or args.no_cache or job_filter):
+        cache = SnapshotCache()
+        cache_key = (current_context(), namespaces)
+    initial = save_cache = None
+    if cache is not None:
+        record = cache.load(*cache_key)
+        if record is not None:
+            initial = snapshot_from_cache(record)
+        save_cache = functools.partial(save_snapshot, cache, cache_key)
+
+    waker = LoopWaker()
+    refresher = Refresher(namespaces, jobs_interval=args.jobs_interval,
+                          quota_interval=args.quota_interval,
+                          watch=args.watch, backend=backend,
+                          max_concurrency=args.max_concurrency,
+                          job_filter=job_filter, initial=initial,
+                          on_update=waker.notify, save=save_cache)
+
+    gpu_sampler = GpuSampler(interval=args.local_interval)
+    usage_sampler = None
+    if args.usage:
+        usage_sampler = PodUsageSampler(
+            lambda: get_pod_usage(namespaces, backend),
+            interval=args.usage_interval, on_update=waker.notify)
+    histories = make_histories(args.history_window, args.local_interval,
+                               psutil.cpu_count() or 1)
+    core_view = CoreView(psutil.cpu_count() or 1)
 
     old_settings = None
     if platform.system() != "Windows":
@@ -448,51 +2491,55 @@ def main():
     try:
         if platform.system() != "Windows":
             tty.setcbreak(sys.stdin.fileno())
+            signal.signal(signal.SIGWINCH, lambda *_: waker.notify())
+
+        refresher.start()
+        gpu_sampler.start()
+        if usage_sampler is not None:
+            usage_sampler.start()
 
-        with Live(layout, refresh_per_second=4, screen=True):
-            last_fetch = 0
-            fetch_interval = 2
+        with Live(layout, auto_refresh=False, screen=True) as live:
             scroll_offset = 0
+            model = None
+            regions = DirtyRegions(layout)
+            last_size = None
+            last_local = 0
+            show_profile = False
 
-            quota = get_quota(args.namespace, use_mock=args.mock, mock_data=mock_data)
-            jobs = get_jobs_pods(args.namespace, use_mock=args.mock,
-                                 mock_data=mock_data)
+            timeout = 0
 
             while True:
-                # Input Handling - process all buffered input and use last nav key
+                # Sleep until a key, a new snapshot, a resize or the next
+                # timer; the last navigation key pressed wins
                 key = None
-                if platform.system() != "Windows":
-                    while sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                        char = sys.stdin.read(1)
-                        if char == '\x1b':  # Escape sequence start
-                            next1 = sys.stdin.read(1)
-                            if next1 == '[':
-                                next2 = sys.stdin.read(1)
-                                if next2 == 'A':  # Up arrow on Unix/Linux
-                                    key = 'up'
-                                elif next2 == 'B':  # Down arrow on Unix/Linux
-                                    key = 'down'
-                        elif char.lower() == 'q':
-                            key = 'q'
-                else:
-                    while msvcrt.kbhit():
-                        key_input = msvcrt.getch()
-                        if key_input == b'H':  # Up arrow on Windows
-                            key = 'up'
-                        elif key_input == b'P':  # Down arrow on Windows
-                            key = 'down'
-                        else:
-                            decoded = key_input.decode('utf-8', errors='ignore').lower()
-                            if decoded == 'q':
-                                key = 'q'
+                for pressed in waker.wait(timeout):
+                    if pressed == 'p':
+                        show_profile = not show_profile
+                    elif key != 'q':
+                        key = pressed
 
                 if key == 'q':
                     break
 
-                cpu_total, cpu_per_core, mem, gpu = get_local_metrics()
+                now = time.time()
+                snapshot = refresher.snapshot
+                if now - last_local >= args.local_interval:
+                    local_metrics = get_local_metrics(gpu_sampler)
+                    profile_summary = timings.summary()
+                    record_history(histories, args.history_window,
+                                   args.local_interval, local_metrics,
+                                   snapshot.quota if snapshot else None)
+                    last_local = now
+
+                if snapshot is not None:
+                    quota, jobs = snapshot.quota, snapshot.jobs
+                else:
+                    quota, jobs = empty_quota(), ()
 
-                # Calculate total rows needed for all jobs (1 row/job + 1 row/pod)
-                total_rows = sum(1 + len(job['pods']) for job in jobs)
+                # Row index is rebuilt only when a new snapshot lands
+                if model is None or model.jobs is not jobs:
+                    model = JobTableModel(jobs)
+                total_rows = model.total_rows
 
                 # Calculate max visible rows (approximate based on available height)
                 # Account for:
@@ -506,32 +2553,89 @@ def main():
 
                 # Navigation
                 if key == 'up':
-                    scroll_offset = max(0, scroll_offset - 1)
+                    scroll_offset = scroll_offset - 1
                 elif key == 'down':
-                    scroll_offset = min(max_scroll, scroll_offset + 1)
-
-                now = time.time()
-                if now - last_fetch > fetch_interval:
-                    quota = get_quota(args.namespace, use_mock=args.mock,
-                                      mock_data=mock_data)
-                    jobs = get_jobs_pods(args.namespace, use_mock=args.mock,
-                                         mock_data=mock_data)
-                    last_fetch = now
-
+                    scroll_offset = scroll_offset + 1
+                elif key == 'pgup':
+                    scroll_offset = scroll_offset - max_visible_rows
+                elif key == 'pgdn':
+                    scroll_offset = scroll_offset + max_visible_rows
+                elif key == 'home':
+                    scroll_offset = 0
+                elif key == 'end':
+                    scroll_offset = max_scroll
+                scroll_offset = max(0, min(max_scroll, scroll_offset))
+
+                age_text = format_age(snapshot, refresher.fetching, now,
+                                      refresher.failed)
+                header_text = f"{header_str} {age_text}"
                 jobs_title = f"Jobs ({len(jobs)})"
 
-                layout["cluster_resources"].update(generate_cluster_resources(quota))
-                layout["local_resources"].update(
-                    generate_local_resources(cpu_total, cpu_per_core, mem, gpu))
-                layout["right"].update(Panel(generate_table(
-                    jobs, offset=scroll_offset, max_rows=max_visible_rows),
-                    title=jobs_title, border_style="green"))
-
-                time.sleep(0.1)
+                # Only regenerate panels whose inputs changed, and only repaint
+                # the screen when a panel changed or the terminal was resized
+                dirty = regions.update(
+                    "header", header_text,
+                    lambda: Panel(header_text, style="white on blue"))
+                dirty |= regions.update(
+                    "cluster_resources", (quota, histories['quota'].version),
+                    lambda: generate_cluster_resources(
+                        quota, len(namespaces) if not args.all_namespaces
+                        else None, histories))
+                # The per-core view depends on the space the panel gets
+                area = core_area(console.size, len(local_metrics[3]))
+                dirty |= regions.update(
+                    "local_resources", (local_metrics, area),
+                    lambda: generate_local_resources(*local_metrics,
+                                                     histories=histories,
+                                                     core_view=core_view,
+                                                     area=area))
+                # Running durations are computed at render time, so the table
+                # also ticks once per second while any job is running
+                tick = int(now) if model.has_running else None
+                # Live usage is joined to the visible rows as they are drawn
+                usage = usage_sampler.read(now) if usage_sampler else None
+                dirty |= regions.update(
+                    "right",
+                    (model, scroll_offset, max_visible_rows, tick, usage),
+                    lambda: Panel(timed_table(
+                        model, offset=scroll_offset, max_rows=max_visible_rows,
+                        show_namespace=show_namespace, usage=usage),
+                        title=jobs_title, border_style="green"))
+
+                footer_text = FOOTER_TEXT
+                if show_profile:
+                    # Percentiles are refreshed with the local metrics tick
+                    footer_text = "p50/p90/p99  " + format_summary(
+                        profile_summary, PROFILE_STAGES)
+                dirty |= regions.update(
+                    "footer", footer_text,
+                    lambda: Panel(footer_text, style="dim"))
+
+                size = console.size
+                if dirty or size != last_size:
+                    with timings.stage('render'):
+                        live.refresh()
+                    last_size = size
+
+                # Timers: local metrics, ticking durations and the age text
+                deadlines = [last_local + args.local_interval - now,
+                             next_age_change(snapshot, now)]
+                if model.has_running:
+                    deadlines.append(1 - now % 1)
+                timeout = max(0, min(deadlines))
 
     except KeyboardInterrupt:
         pass
     finally:
+        refresher.stop()
+        gpu_sampler.stop()
+        if usage_sampler is not None:
+            usage_sampler.stop()
+        backend.close()
+        waker.close()
+        if save_cache is not None and refresher.loaded:
+            save_cache(refresher.snapshot)
+        save_profiles(args, profiler)
         if old_settings and platform.system() != "Windows":
             termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
         print("Exited.")
@@ -0,0 +1,62 @@
+import time
+import threading
+
+from scheduler import AdaptiveInterval
+
+
+class PodUsageSampler:
+    """Polls live per-pod usage off the render loop and caches it with a TTL.
+
+    ``fetch()`` returns ``{(namespace, pod): usage}``. It runs on its own
+    ``AdaptiveInterval`` schedule, slower than the job listing because
+    metrics-server only scrapes every 15s or so, and backs off while it keeps
+    failing (for instance on a cluster without metrics-server). ``read()``
+    never blocks: it returns the last result, or nothing once that result is
+    older than ``ttl`` seconds. The default TTL outlasts the longest backed
+    off interval by one base interval, so only failed polls let it expire.
+    """
+
+    EMPTY = {}
+
+    def __init__(self, fetch, interval=15.0, ttl=None, on_update=None):
+        self.fetch = fetch
+        self.schedule = AdaptiveInterval(interval)
+        if ttl is None:
+            ttl = interval * (self.schedule.max_factor + 1)
+        self.ttl = ttl
+        self.on_update = on_update
+        # Replaced as a whole so readers never see half of an update
+        self._result = (self.EMPTY, 0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def read(self, now=None):
+        usage, fetched_at = self._result
+        if (now or time.time()) - fetched_at > self.ttl:
+            return self.EMPTY
+        return usage
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.time()
+            started = time.perf_counter()
+            changed = False
+            try:
+                usage = self.fetch()
+                changed = usage != self._result[0]
+                # An unchanged result keeps its identity, so nothing redraws
+                if not changed:
+                    usage = self._result[0]
+                self._result = (usage, time.time())
+                if changed and self.on_update:
+                    self.on_update()
+            except Exception:
+                pass
+            self.schedule.done(now, changed, time.perf_counter() - started)
+            self._stop.wait(max(0, self.schedule.due - time.time()))
@@ -0,0 +1,133 @@
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Rolling wall-time samples per pipeline stage.
+
+    Each stage keeps its last ``window`` durations, so percentiles describe
+    recent behaviour and memory stays bounded however long the session runs.
+    Safe to record from fetch threads while the render loop reads.
+    """
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self):
+        with self._lock:
+            samples = {name: sorted(values)
+                       for name, values in self._samples.items()}
+            counts = dict(self._counts)
+
+        result = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            result[name] = {'count': counts[name], 'max': values[-1]}
+            for p in (50, 90, 99):
+                index = min(len(values) - 1, int(len(values) * p / 100))
+                result[name][f'p{p}'] = values[index]
+        return result
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+timings = StageTimer()
+
+
+def format_summary(summary, order=None):
+    parts = []
+    for name in order or sorted(summary):
+        if name in summary:
+            stats = summary[name]
+            parts.append(f"{name} {stats['p50'] * 1000:.1f}/"
+                         f"{stats['p90'] * 1000:.1f}/"
+                         f"{stats['p99'] * 1000:.1f}ms")
+    return "  ".join(parts)
+
+
+class _ProfileSnapshot:
+    """A running profiler's stats, in the shape ``pstats.Stats`` loads."""
+
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = dict(profile.stats)
+
+    def create_stats(self):
+        pass
+
+
+class ThreadedProfile:
+    """cProfile over every thread of the session, saved as one stats file.
+
+    Before Python 3.12 a ``cProfile.Profile`` only sees the thread that
+    enabled it, so while enabled each new thread (fetchers, executor workers,
+    watchers, samplers) gets its own profiler through ``threading.setprofile``
+    and ``dump`` merges them with the main thread's. From 3.12 only one
+    profiler may be active per process and the main one already sees every
+    thread, so no per-thread profilers are started.
+    """
+
+    PER_THREAD = sys.version_info < (3, 12)
+
+    def __init__(self):
+        self._main = cProfile.Profile()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start_thread(self, *args):
+        # Runs as the first profile event of each new thread
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._threads.append(profile)
+        profile.enable()
+
+    def enable(self):
+        if self.PER_THREAD:
+            threading.setprofile(self._start_thread)
+        self._main.enable()
+
+    def disable(self):
+        if self.PER_THREAD:
+            threading.setprofile(None)
+        self._main.disable()
+
+    def dump(self, path):
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            profiles = list(self._threads)
+        for profile in profiles:
+            # Worker threads may still be running: read, do not disable
+            snapshot = _ProfileSnapshot(profile)
+            # pstats refuses to load an empty profile
+            if snapshot.stats:
+                stats.add(snapshot)
+        stats.dump_stats(path)
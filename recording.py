@@ -0,0 +1,271 @@
+import gzip
+import json
+import time
+import threading
+
+from kube_api import RESOURCE_PATHS, ListingRestarted, merge_page
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _key(kind, ns, resources, selector=None, field_selector=None):
+    return '|'.join((kind, '*' if ns is None else ns, resources,
+                     selector or '', field_selector or ''))
+
+
+def _kinds(resources):
+    return [RESOURCE_PATHS[resource][2] for resource in resources.split(',')]
+
+
+def iter_records(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A session killed mid-write leaves a truncated last line
+                    continue
+        except EOFError:
+            # ...and no gzip trailer; everything flushed before that is intact
+            return
+
+
+def iter_listings(path, key=None):
+    """Yield ``(key, t, grouped)`` for each complete recorded listing.
+
+    Only one listing per key is held in memory at a time; the pages of a
+    listing that was recorded as discarded are dropped.
+    """
+    pending = {}
+    for record in iter_records(path):
+        if key is not None and record.get('key') != key:
+            continue
+        if record.get('discard'):
+            pending.pop(record['key'], None)
+            continue
+        if 'page' not in record:
+            continue
+        t, grouped = pending.setdefault(record['key'], (record['t'], {}))
+        merge_page(grouped, record['page'])
+        if not record.get('more'):
+            del pending[record['key']]
+            yield record['key'], t, grouped
+
+
+def session_namespaces(path):
+    for record in iter_records(path):
+        if 'session' in record:
+            return record['session']['namespaces']
+    return None
+
+
+class RecordingBackend:
+    """Passes calls through to ``backend`` and appends every result to a log.
+
+    The log is gzipped NDJSON that each ``--record`` session appends to: a
+    ``session`` line naming the namespaces, then one line per listed page
+    and per watch ``event``. Listings are recorded per kind and namespace,
+    so a replay can serve any combination of kinds: each page line holds the
+    ``key`` of one kind, the listing's start time ``t``, ``more`` while the
+    listing goes on and the kind's ``page`` of items. A final line without
+    ``more`` completes the listing; a listing that failed midway ends with a
+    ``discard`` line instead.
+    """
+
+    def __init__(self, backend, path, namespaces):
+        self.backend = backend
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._write({'session': {'namespaces': namespaces}, 't': time.time()})
+
+    def _write(self, record, flush=True):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            if flush:
+                # Sync-flushed so the log is readable even after a crash
+                self._file.flush()
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        keys = {kind: _key('list', ns, kind, selector, field_selector)
+                for kind in _kinds(resources)}
+        started = time.time()
+        try:
+            for page in self.backend.pages(ns, resources, selector,
+                                           field_selector):
+                for kind, items in page.items():
+                    self._write({'key': keys[kind], 't': started,
+                                 'more': True, 'page': {kind: items}},
+                                flush=False)
+                yield page
+        except BaseException:
+            # Also on GeneratorExit: a listing abandoned midway is incomplete
+            for key in keys.values():
+                self._write({'key': key, 't': started, 'discard': True})
+            raise
+        for kind, key in keys.items():
+            self._write({'key': key, 't': started, 'page': {kind: []}})
+
+    def list(self, ns, resources, selector=None, field_selector=None):
+        try:
+            return self._list(ns, resources, selector, field_selector)
+        except ListingRestarted:
+            return self._list(ns, resources, selector, field_selector)
+
+    def _list(self, ns, resources, selector=None, field_selector=None):
+        grouped = {}
+        for page in self.pages(ns, resources, selector, field_selector):
+            merge_page(grouped, page)
+        return grouped
+
+    def watch(self, ns, resource, selector=None, field_selector=None,
+              resource_version=None):
+        return RecordingWatch(
+            self.backend.watch(ns, resource, selector, field_selector,
+                               resource_version),
+            self, _key('watch', ns, resource, selector, field_selector))
+
+    def close(self):
+        self.backend.close()
+        with self._lock:
+            self._file.close()
+
+
+class RecordingWatch:
+    def __init__(self, stream, recorder, key):
+        self._stream = stream
+        self._recorder = recorder
+        self._key = key
+
+    @property
+    def resource_version(self):
+        return self._stream.resource_version
+
+    @property
+    def replays_list(self):
+        return getattr(self._stream, 'replays_list', False)
+
+    def __iter__(self):
+        for event in self._stream:
+            # SYNCED marks where kubectl's replayed listing ended, no change
+            if event.get('type') != 'SYNCED':
+                self._recorder._write(
+                    {'key': self._key, 't': time.time(), 'event': event})
+            yield event
+
+    def close(self):
+        self._stream.close()
+
+
+class ReplayClock:
+    """Maps wall time onto the recording's timeline at ``speed``."""
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = speed
+        self.wall_start = time.time()
+
+    def now(self):
+        return self.start + (time.time() - self.wall_start) * self.speed
+
+    def wait_until(self, t, stop):
+        """Sleep until recorded time ``t``; False if ``stop`` was set first."""
+        delay = (t - self.now()) / self.speed
+        return delay <= 0 or not stop.wait(delay)
+
+
+class _ListingCursor:
+    """Streams the listings of one key, keeping only the current and next."""
+
+    def __init__(self, path, key):
+        self._listings = iter_listings(path, key)
+        self.current = None
+        self.next = self._read()
+
+    def _read(self):
+        listing = next(self._listings, None)
+        return listing and listing[1:]
+
+    def at(self, t):
+        if self.current is None or (self.next and self.next[0] <= t):
+            while True:
+                self.current, self.next = self.next, self._read()
+                if not self.next or self.next[0] > t:
+                    break
+        return self.current
+
+
+class ReplayBackend:
+    """Serves a recording through the backend interface, paced by its clock.
+
+    Each listing returns what the recording held at the matching point of its
+    timeline: for every requested kind, the latest listing of that kind in
+    the same namespace with the same selectors. A kind the recording never
+    listed raises ``ReplayError``. Watch streams replay their events as their
+    time comes. The file is streamed from disk, never loaded whole.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        start = next((record['t'] for record in iter_records(path)), 0)
+        self.clock = ReplayClock(start, speed)
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        page = {}
+        now = self.clock.now()
+        for kind in _kinds(resources):
+            key = _key('list', ns, kind, selector, field_selector)
+            with self._lock:
+                cursor = self._cursors.get(key)
+                if cursor is None:
+                    cursor = self._cursors[key] = _ListingCursor(self.path, key)
+                listing = cursor.at(now)
+            if listing is None:
+                raise ReplayError(
+                    f"{self.path} has no {kind} listing for namespace "
+                    f"{'*' if ns is None else ns} with these selectors")
+            page[kind] = listing[1].get(kind, [])
+        yield page
+
+    def list(self, ns, resources, selector=None, field_selector=None):
+        grouped = {}
+        for page in self.pages(ns, resources, selector, field_selector):
+            merge_page(grouped, page)
+        return grouped
+
+    def watch(self, ns, resource, selector=None, field_selector=None,
+              resource_version=None):
+        return ReplayWatch(self, _key('watch', ns, resource, selector,
+                                      field_selector))
+
+    def close(self):
+        pass
+
+
+class ReplayWatch:
+    resource_version = None
+
+    def __init__(self, backend, key):
+        self._backend = backend
+        self._key = key
+        self._stop = threading.Event()
+
+    def __iter__(self):
+        clock = self._backend.clock
+        since = clock.now()
+        for record in iter_records(self._backend.path):
+            if record.get('key') != self._key or record['t'] <= since:
+                continue
+            if not clock.wait_until(record['t'], self._stop):
+                return
+            yield record['event']
+        # Like a quiet API server: the stream stays open until closed
+        self._stop.wait()
+
+    def close(self):
+        self._stop.set()
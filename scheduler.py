@@ -0,0 +1,35 @@
+class AdaptiveInterval:
+    """When one polled source is next due, stretched while it is idle or slow.
+
+    The interval starts at ``base``. After ``idle_cycles`` results in a row
+    without a change it doubles on every further unchanged result, up to
+    ``base * max_factor``; the first change snaps it back to ``base``. A call
+    taking ``duration`` seconds also holds the interval at no less than
+    ``duration * slow_factor``, so a struggling API server is polled less.
+    """
+
+    def __init__(self, base, max_factor=8, idle_cycles=3, slow_factor=4):
+        self.base = base
+        self.max_factor = max_factor
+        self.idle_cycles = idle_cycles
+        self.slow_factor = slow_factor
+        self.current = base
+        self.due = 0
+        self._unchanged = 0
+
+    def is_due(self, now):
+        return now >= self.due
+
+    def done(self, now, changed, duration=0.0):
+        """Record a finished poll and schedule the next one."""
+        longest = self.base * self.max_factor
+        if changed:
+            self._unchanged = 0
+            self.current = self.base
+        else:
+            self._unchanged += 1
+            if self._unchanged >= self.idle_cycles:
+                self.current = min(self.current * 2, longest)
+        self.current = max(self.current,
+                           min(duration * self.slow_factor, longest))
+        self.due = now + self.current
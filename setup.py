@@ -13,12 +13,17 @@ setup(
     author="yyx",
     url="https://github.com/yyx/kubmonitor-cli",
     packages=find_packages(),
-    py_modules=["monitor", "mock_data", "version"],
+    py_modules=["monitor", "mock_data", "gpu_sampler", "kube_api",
+                "profiling", "models", "history", "scheduler",
+                "snapshot_cache", "recording", "pod_usage", "version"],
     install_requires=[
         "rich",
         "psutil"
     ],
     extras_require={
+        "api": [
+            "pyyaml",
+        ],
         "dev": [
             "flake8",
         ]
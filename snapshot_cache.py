@@ -0,0 +1,107 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+CACHE_VERSION = 1
+
+# Snapshots that compress to more than this are not worth a cache file
+MAX_FILE_BYTES = 8 * 2 ** 20
+# Oldest files are evicted beyond either limit
+MAX_TOTAL_BYTES = 64 * 2 ** 20
+MAX_ENTRIES = 32
+
+
+def cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'kubmonitor')
+
+
+def current_context():
+    """The kubeconfig's ``current-context``, read without a YAML parser."""
+    path = os.environ.get('KUBECONFIG', '').split(os.pathsep)[0]
+    path = path or os.path.expanduser('~/.kube/config')
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('current-context:'):
+                    return line.split(':', 1)[1].strip().strip('"\'')
+    except OSError:
+        pass
+    return ''
+
+
+class SnapshotCache:
+    """Last snapshot per (context, namespaces), as gzipped JSON files.
+
+    Files are written atomically and named by a hash of their key, and the
+    directory is trimmed to ``max_entries`` files and ``max_total`` bytes by
+    evicting the least recently written ones.
+    """
+
+    def __init__(self, directory=None, max_entries=MAX_ENTRIES,
+                 max_total=MAX_TOTAL_BYTES, max_file=MAX_FILE_BYTES):
+        self.directory = directory or cache_dir()
+        self.max_entries = max_entries
+        self.max_total = max_total
+        self.max_file = max_file
+
+    def path(self, context, namespaces):
+        key = '\0'.join([context] + [ns or '*' for ns in namespaces])
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def load(self, context, namespaces):
+        """Return the cached record for the key, or ``None``."""
+        try:
+            with gzip.open(self.path(context, namespaces), 'rt',
+                           encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        if (record.get('version') != CACHE_VERSION
+                or record.get('context') != context
+                or record.get('namespaces') != list(namespaces)):
+            return None
+        return record
+
+    def save(self, context, namespaces, record):
+        record = dict(record, version=CACHE_VERSION, context=context,
+                      namespaces=list(namespaces))
+        data = gzip.compress(
+            json.dumps(record, separators=(',', ':')).encode('utf-8'))
+        if len(data) > self.max_file:
+            return False
+
+        path = self.path(context, namespaces)
+        # Per thread: the fetch thread and the exit path may both save
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json.gz'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        total = 0
+        for count, (_, size, path) in enumerate(entries, 1):
+            total += size
+            if count > self.max_entries or total > self.max_total:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
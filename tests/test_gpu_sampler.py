@@ -0,0 +1,137 @@
+"""GpuSampler's nvidia-smi path against a fake nvidia-smi on PATH."""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gpu_sampler  # noqa: E402
+from gpu_sampler import GpuSampler, GpuStat, QUERY, parse_smi_line  # noqa: E402
+
+# Streams two GPUs every --loop-ms like the real tool, with a malformed line
+# mixed in, until terminated. Records its arguments and pid for the test.
+FAKE_SMI = f"""#!{sys.executable}
+import os, sys, time
+log = os.environ['FAKE_SMI_LOG']
+with open(log, 'w') as f:
+    f.write(str(os.getpid()) + '\\n' + '\\n'.join(sys.argv[1:]))
+loop = [a for a in sys.argv if a.startswith('--loop-ms=')]
+delay = int(loop[0].split('=')[1]) / 1000 if loop else None
+tick = 0
+while True:
+    print(f"0, {{tick % 100}}, 1024, 40960")
+    print("1, [N/A], 2048, 40960")
+    print("No devices were found")
+    sys.stdout.flush()
+    if delay is None:
+        break
+    tick += 1
+    time.sleep(delay)
+"""
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_smi_line(self):
+        self.assertEqual(parse_smi_line("3, 87, 1000, 80000\n"),
+                         GpuStat(3, 87.0, 1000.0, 80000.0))
+        self.assertEqual(parse_smi_line("0, [N/A], [N/A], 16000"),
+                         GpuStat(0, None, None, 16000.0))
+        self.assertIsNone(parse_smi_line("NVIDIA-SMI has failed"))
+        self.assertIsNone(parse_smi_line(""))
+
+
+class SmiSamplerTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        smi = os.path.join(self.dir, 'nvidia-smi')
+        with open(smi, 'w') as f:
+            f.write(FAKE_SMI)
+        os.chmod(smi, 0o755)
+        self.log = os.path.join(self.dir, 'args')
+        env = {'PATH': self.dir + os.pathsep + os.environ.get('PATH', ''),
+               'FAKE_SMI_LOG': self.log}
+        for patch in (mock.patch.dict(os.environ, env),
+                      mock.patch.object(gpu_sampler, '_load_nvml',
+                                        return_value=None)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def child(self):
+        with open(self.log) as f:
+            pid, *args = f.read().splitlines()
+        return int(pid), args
+
+    def test_streams_and_stops_child(self):
+        sampler = GpuSampler(interval=0.05)
+        self.assertTrue(sampler.available)
+        sampler.start()
+        self.addCleanup(sampler.stop)
+
+        self.assertTrue(wait_for(lambda: len(sampler.read()) == 2))
+        first = sampler.read()[0].util
+        # Later loop iterations keep updating the same child's readings
+        self.assertTrue(wait_for(lambda: sampler.read()[0].util != first))
+        self.assertEqual(sampler.read()[1], GpuStat(1, None, 2048.0, 40960.0))
+
+        pid, args = self.child()
+        self.assertIn(f"--query-gpu={QUERY}", args)
+        self.assertIn("--format=csv,noheader,nounits", args)
+        self.assertIn("--loop-ms=50", args)
+
+        proc = sampler._proc
+        sampler.stop()
+        sampler._thread.join(5)
+        self.assertFalse(sampler._thread.is_alive())
+        # Terminated and reaped, not left running or as a zombie
+        self.assertIsNotNone(proc.returncode)
+        self.assertFalse(pid_alive(pid))
+
+    def test_stop_while_child_starts(self):
+        sampler = GpuSampler(interval=0.05)
+        popen = gpu_sampler.subprocess.Popen
+
+        def start_then_stop(*args, **kwargs):
+            proc = popen(*args, **kwargs)
+            sampler.stop()
+            return proc
+
+        with mock.patch.object(gpu_sampler.subprocess, 'Popen',
+                               side_effect=start_then_stop):
+            sampler.start()
+            sampler._thread.join(5)
+        self.assertFalse(sampler._thread.is_alive())
+        self.assertIsNotNone(sampler._proc.returncode)
+
+    def test_without_nvidia_smi(self):
+        with mock.patch.dict(os.environ, {'PATH': self.dir + '/missing'}):
+            sampler = GpuSampler()
+        self.assertFalse(sampler.available)
+        sampler.start()
+        sampler.stop()
+        self.assertEqual(sampler.read(), ())
+
+
+if __name__ == '__main__':
+    unittest.main()
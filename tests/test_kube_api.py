@@ -0,0 +1,230 @@
+"""ApiBackend list/watch against a canned local API server."""
+import os
+import sys
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kube_api import ApiBackend, ApiError, ListingExpired  # noqa: E402
+from monitor import ResourceWatcher  # noqa: E402
+
+PODS = '/api/v1/namespaces/ns/pods'
+
+
+def pod(name, version):
+    return {'metadata': {'name': name, 'uid': f"uid-{name}",
+                         'resourceVersion': version},
+            'status': {'phase': 'Running'}}
+
+
+def event(kind, obj):
+    return json.dumps({'type': kind, 'object': obj}) + "\n"
+
+
+class CannedServer(ThreadingHTTPServer):
+    """Serves two list pages at resourceVersion 100 and queued watch bodies.
+
+    Each watch request takes the next body in ``watches``; once they run out
+    the stream stays open and silent until ``release`` is set.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), CannedHandler)
+        self.requests = []
+        self.watches = []
+        self.release = threading.Event()
+
+    def queries(self, watch):
+        return [query for path, query in self.requests
+                if path == PODS and ('watch' in query) == watch]
+
+
+class CannedHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+        if url.path != PODS:
+            self.send_error(404)
+            return
+        if 'watch' in query:
+            self._watch()
+        elif query.get('continue') == 'page2':
+            self._json({'metadata': {'resourceVersion': '100'},
+                        'items': [pod('b', '90')]})
+        else:
+            self._json({'metadata': {'resourceVersion': '100',
+                                     'continue': 'page2'},
+                        'items': [pod('a', '80')]})
+
+    def _json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _watch(self):
+        # HTTP/1.0 without a length: the stream ends when the server closes
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        if not self.server.watches:
+            self.server.release.wait(10)
+            return
+        self.wfile.write(self.server.watches.pop(0).encode())
+        self.wfile.flush()
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive that drops connections idle for half a second."""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = 0.5
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'metadata': {}, 'items': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ApiPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.backend = ApiBackend(f"http://{host}:{port}")
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_retry_after_idle_connections_closed(self):
+        pool = self.backend.pool
+        conns = [pool.connect() for _ in range(2)]
+        for conn in conns:
+            conn.request('GET', PODS)
+            conn.getresponse().read()
+        for conn in conns:
+            pool.release(conn)
+        # The server closes both pooled connections meanwhile
+        time.sleep(1)
+
+        self.assertEqual(self.backend.request(PODS)['items'], [])
+
+
+class ApiWatchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = CannedServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.backend = ApiBackend(f"http://{host}:{port}", chunk_size=1)
+
+    def tearDown(self):
+        self.server.release.set()
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_watch_starts_from_the_listing(self):
+        self.server.watches.append(
+            event('ADDED', pod('c', '101'))
+            + event('BOOKMARK', {'metadata': {'resourceVersion': '105'}}))
+        grouped = self.backend.list('ns', 'pods')
+        self.assertEqual([p['metadata']['name'] for p in grouped['Pod']],
+                         ['a', 'b'])
+
+        stream = self.backend.watch('ns', 'pods')
+        events = list(stream)
+
+        query, = self.server.queries(watch=True)
+        self.assertEqual(query['resourceVersion'], '100')
+        self.assertEqual(query['timeoutSeconds'], str(ApiBackend.WATCH_TIMEOUT))
+        self.assertEqual(query['allowWatchBookmarks'], 'true')
+        # Bookmarks move the version on but are not yielded
+        self.assertEqual([e['type'] for e in events], ['ADDED'])
+        self.assertEqual(stream.resource_version, '105')
+
+    def test_explicit_version_and_selectors(self):
+        self.server.watches.append("")
+        self.backend.list('ns', 'pods')
+        stream = self.backend.watch('ns', 'pods', selector='app=x',
+                                    resource_version='42')
+        self.assertEqual(list(stream), [])
+
+        query, = self.server.queries(watch=True)
+        self.assertEqual(query['resourceVersion'], '42')
+        self.assertEqual(query['labelSelector'], 'app=x')
+        self.assertEqual(stream.resource_version, '42')
+
+    def test_unlisted_collection_watches_from_now(self):
+        self.server.watches.append("")
+        list(self.backend.watch('ns', 'pods'))
+        query, = self.server.queries(watch=True)
+        self.assertNotIn('resourceVersion', query)
+
+    def test_expired_version_raises(self):
+        self.server.watches.append(event(
+            'ERROR', {'kind': 'Status', 'code': 410, 'message': 'too old'}))
+        stream = self.backend.watch('ns', 'pods', resource_version='1')
+        with self.assertRaises(ListingExpired):
+            list(stream)
+        self.assertIsNone(stream.resource_version)
+
+    def test_silent_stream_times_out(self):
+        self.backend.WATCH_TIMEOUT = 0
+        self.backend.pool.timeout = 0.2
+        stream = self.backend.watch('ns', 'pods')
+        started = time.monotonic()
+        with self.assertRaises(OSError):
+            list(stream)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_watch_http_error(self):
+        with self.assertRaises(ApiError):
+            self.backend.watch('other', 'pods')
+
+    def test_watcher_resumes_without_relisting(self):
+        self.server.watches += [
+            event('ADDED', pod('c', '101')),
+            event('DELETED', pod('a', '102'))]
+        watcher = ResourceWatcher('ns', 'pods', self.backend)
+        watcher.start()
+        try:
+            deadline = time.monotonic() + 5
+            while (len(self.server.queries(watch=True)) < 3
+                   and time.monotonic() < deadline):
+                time.sleep(0.02)
+            names = sorted(p['metadata']['name'] for p in watcher.items())
+        finally:
+            watcher.stop()
+
+        versions = [q.get('resourceVersion')
+                    for q in self.server.queries(watch=True)]
+        self.assertEqual(versions, ['100', '101', '102'])
+        # One listing of two pages, then only watches
+        self.assertEqual(len(self.server.queries(watch=False)), 2)
+        self.assertEqual(names, ['b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
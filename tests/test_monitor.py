@@ -0,0 +1,536 @@
+"""Fetch pipeline of monitor.py against the mock backend and a fake kubectl."""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_data import MockBackend, MockCluster  # noqa: E402
+from models import JobStatus  # noqa: E402
+from recording import (RecordingBackend, ReplayBackend,  # noqa: E402
+                       iter_records)
+from monitor import (JobFilter, KubectlBackend, KubectlWatch,  # noqa: E402
+                     PROJECTED_FIELDS, Refresher, ResourceWatcher, _json_values,
+                     build_jobs, format_age, get_namespace, get_namespaces,
+                     index_pods_by_job,
+                     parse_projected_row, parse_windows_keys, run_headless)
+
+JOBS = 600
+
+# Prints JOBS projected job rows, then the quota as a Go map the way older
+# kubectl does; serves the same objects as JSON through --raw.
+FAKE_KUBECTL = f"""#!{sys.executable}
+import json, sys
+jobs = [{{'kind': 'Job', 'metadata': {{'name': f'job-{{i}}', 'namespace': 'ns',
+          'uid': f'uid-{{i}}'}}, 'spec': {{'completions': 1}},
+          'status': {{'active': 1, 'startTime': '2024-01-01T00:00:00Z'}}}}
+        for i in range({JOBS})]
+quota = {{'kind': 'ResourceQuota', 'metadata': {{'name': 'q', 'namespace': 'ns'}},
+         'status': {{'hard': {{'requests.cpu': '10'}},
+                    'used': {{'requests.cpu': '2'}}}}}}
+if '--raw' in sys.argv:
+    path = sys.argv[sys.argv.index('--raw') + 1]
+    items = (jobs if '/jobs' in path else
+             [quota] if '/resourcequotas' in path else [])
+    print(json.dumps({{'metadata': {{}}, 'items': items}}))
+    sys.exit()
+for job in jobs:
+    print('\t'.join(['Job', 'ns', job['metadata']['name'],
+                     job['metadata']['uid'], '', '', '', '1', '', '', '1',
+                     '2024-01-01T00:00:00Z', '', '', 'img', '', '', '']))
+print('\t'.join(['ResourceQuota', 'ns', 'q', 'uid-q'] + [''] * 11
+                 + ['map[requests.cpu:10]', 'map[requests.cpu:2]', '']))
+"""
+
+# Lists pods a and b as Running. Watching, it replays a later listing as full
+# objects: a has succeeded, b was deleted and c created meanwhile; then it
+# stays silent.
+FAKE_WATCH_KUBECTL = f"""#!{sys.executable}
+import json, sys, time
+if '--watch' not in sys.argv:
+    for name in 'ab':
+        print('\\t'.join(['Pod', 'ns', name, 'uid-' + name] + [''] * 2
+                         + ['Running'] + [''] * 11))
+    sys.exit()
+with open(sys.argv[0] + '.args', 'w') as f:
+    f.write('\\n'.join(sys.argv[1:]))
+for name, phase in (('a', 'Succeeded'), ('c', 'Running')):
+    pod = {{'kind': 'Pod', 'metadata': {{'name': name, 'namespace': 'ns',
+            'uid': 'uid-' + name, 'managedFields': [{{'manager': 'kubelet'}}]}},
+            'spec': {{'containers': [{{'env': [{{'name': 'A', 'value': '1'}}]}}]}},
+            'status': {{'phase': phase}}}}
+    print(json.dumps({{'type': 'ADDED', 'object': pod}}, indent=4))
+sys.stdout.flush()
+time.sleep(30)
+"""
+
+# Lists pod a; every watch is refused the way RBAC refuses it, and counted.
+FAKE_FORBIDDEN_KUBECTL = f"""#!{sys.executable}
+import sys
+if '--watch' not in sys.argv:
+    print('\\t'.join(['Pod', 'ns', 'a', 'uid-a', '', '', 'Running'] + [''] * 11))
+    sys.exit()
+with open(sys.argv[0] + '.watches', 'a') as f:
+    f.write('watch\\n')
+sys.stderr.write('Error from server (Forbidden): pods is forbidden: '
+                 'cannot watch resource "pods"\\n')
+sys.exit(1)
+"""
+
+
+def projected_row(**values):
+    return '\t'.join(values.get(key, '') for key, _ in PROJECTED_FIELDS)
+
+
+class FailingBackend(MockBackend):
+    """Serves the mock cluster except for the namespaces in ``failing``."""
+
+    def __init__(self, failing):
+        super().__init__(MockCluster(jobs=5, seed=1))
+        self.failing = set(failing)
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        if ns in self.failing:
+            raise RuntimeError(f'namespaces "{ns}" is forbidden')
+        return super().pages(ns, resources, selector, field_selector)
+
+
+class NamespaceFailureTest(unittest.TestCase):
+    def test_failed_namespace_does_not_fail_the_others(self):
+        backend = FailingBackend({'bad'})
+        quota, jobs, failed = get_namespaces(['good', 'bad'], backend=backend)
+        self.assertEqual(len(jobs), 5)
+        self.assertEqual(set(failed), {'bad'})
+        self.assertIn('forbidden', str(failed['bad']))
+
+    def test_every_namespace_failing_raises(self):
+        backend = FailingBackend({'a', 'b'})
+        with self.assertRaises(RuntimeError):
+            get_namespaces(['a', 'b'], backend=backend)
+
+    def test_failed_namespace_keeps_its_last_good_data(self):
+        backend = FailingBackend(())
+        last = {}
+        _, jobs, _ = get_namespaces(['one', 'two'], backend=backend, last=last)
+        self.assertEqual(len(jobs), 10)
+
+        backend.failing.add('two')
+        _, jobs, failed = get_namespaces(['one', 'two'], backend=backend,
+                                         last=last)
+        self.assertEqual(len(jobs), 10)
+        self.assertEqual(set(failed), {'two'})
+
+    def test_refresher_loads_and_reports_failed_namespaces(self):
+        refresher = Refresher(['good', 'bad'], backend=FailingBackend({'bad'}))
+        try:
+            refresher.fetch()
+        finally:
+            refresher.stop()
+        self.assertTrue(refresher.loaded)
+        self.assertEqual(len(refresher.snapshot.jobs), 5)
+        self.assertEqual(refresher.failed, ['bad'])
+        self.assertIn('failed: bad', format_age(refresher.snapshot, False,
+                                                failed=refresher.failed))
+
+
+class BrokenListingBackend(MockBackend):
+    """Yields the first page of every listing, then fails while ``broken``."""
+
+    def __init__(self):
+        super().__init__(MockCluster(jobs=6, seed=1), chunk_size=2)
+        self.broken = True
+
+    def pages(self, ns, resources, selector=None, field_selector=None):
+        for index, page in enumerate(
+                super().pages(ns, resources, selector, field_selector)):
+            if index and self.broken:
+                raise RuntimeError("connection reset")
+            yield page
+
+
+class PartialSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch('monitor.PARTIAL_INTERVAL', 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_partial_pages_are_marked_until_a_listing_completes(self):
+        backend = BrokenListingBackend()
+        refresher = Refresher(['ns'], backend=backend)
+        self.addCleanup(refresher.stop)
+        for attempt in range(2):
+            previous = refresher.snapshot
+            with self.assertRaises(RuntimeError):
+                refresher._fetch(time.time(), True, True)
+            # Retries after a failed first listing still publish their pages
+            self.assertIsNot(refresher.snapshot, previous)
+            self.assertTrue(refresher.snapshot.partial)
+            self.assertTrue(refresher.snapshot.jobs)
+            self.assertFalse(refresher.loaded)
+            self.assertIn('loading…', format_age(refresher.snapshot, False))
+
+        backend.broken = False
+        refresher._fetch(time.time(), True, True)
+        self.assertTrue(refresher.loaded)
+        self.assertFalse(refresher.snapshot.partial)
+        self.assertEqual(len(refresher.snapshot.jobs), 6)
+        self.assertIn('updated', format_age(refresher.snapshot, False))
+
+
+class HeadlessErrorTest(unittest.TestCase):
+    def run_headless(self, backend, **options):
+        """Run until it returns or the backend interrupts; return its output."""
+        args = argparse.Namespace(max_concurrency=1, all_namespaces=False,
+                                  usage=False, once=False, json=False,
+                                  ndjson=False, interval=0)
+        vars(args).update(options)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status = None
+        with mock.patch('sys.stdout', stdout), mock.patch('sys.stderr', stderr):
+            try:
+                status = run_headless(args, ['bad'], backend)
+            except KeyboardInterrupt:
+                pass
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_once_prints_one_line_and_fails(self):
+        status, stdout, stderr = self.run_headless(FailingBackend({'bad'}),
+                                                   once=True, json=True)
+        self.assertEqual(status, 1)
+        self.assertEqual(stdout, '')
+        self.assertEqual(stderr.strip().splitlines(),
+                         ['Error: namespaces "bad" is forbidden'])
+
+    def test_ndjson_keeps_streaming_after_an_error(self):
+        backend = FailingBackend({'bad'})
+        fetches = []
+
+        def pages(ns, *args):
+            # Fail the first fetch, serve the second, stop at the third
+            fetches.append(ns)
+            if len(fetches) == 2:
+                backend.failing.clear()
+            elif len(fetches) == 3:
+                raise KeyboardInterrupt
+            return FailingBackend.pages(backend, ns, *args)
+
+        backend.pages = pages
+        _, stdout, _ = self.run_headless(backend, ndjson=True)
+        first, second = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(first['error'], 'namespaces "bad" is forbidden')
+        self.assertEqual(first['namespaces'], ['bad'])
+        self.assertNotIn('error', second)
+        self.assertEqual(len(second['jobs']), 5)
+
+
+class ProjectedRowTest(unittest.TestCase):
+    def test_json_values(self):
+        self.assertEqual(_json_values(''), [])
+        self.assertEqual(_json_values('{"cpu":"1"} {"nvidia.com/gpu":"2"}'),
+                         [{'cpu': '1'}, {'nvidia.com/gpu': '2'}])
+        with self.assertRaises(ValueError):
+            _json_values('map[cpu:1]')
+
+    def test_job_row(self):
+        obj = parse_projected_row(projected_row(
+            kind='Job', namespace='ns', name='train', uid='u1', active='1',
+            completions='2', startTime='2024-01-01T00:00:00Z',
+            failedTime='2024-01-01T01:00:00Z', image='img:1'))
+        self.assertEqual(obj['metadata'],
+                         {'name': 'train', 'namespace': 'ns', 'uid': 'u1'})
+        self.assertEqual(obj['status'], {
+            'active': 1, 'startTime': '2024-01-01T00:00:00Z',
+            'conditions': [{'type': 'Failed',
+                            'lastTransitionTime': '2024-01-01T01:00:00Z'}]})
+        self.assertEqual(obj['spec'], {
+            'completions': 2,
+            'template': {'spec': {'containers': [{'image': 'img:1'}]}}})
+
+    def test_pod_row(self):
+        obj = parse_projected_row(projected_row(
+            kind='Pod', namespace='ns', name='train-abc', owner='train',
+            job_label='train', phase='Running',
+            requests='{"cpu":"1"} {"nvidia.com/gpu":"2"}'))
+        self.assertEqual(obj['metadata']['ownerReferences'],
+                         [{'kind': 'Job', 'name': 'train'}])
+        self.assertEqual(obj['metadata']['labels'], {'job-name': 'train'})
+        self.assertEqual(obj['status'], {'phase': 'Running'})
+        self.assertIn('spec', obj)
+
+    def test_quota_row(self):
+        obj = parse_projected_row(projected_row(
+            kind='ResourceQuota', namespace='ns', name='q',
+            hard='{"requests.cpu":"10"}', used='{"requests.cpu":"2"}'))
+        self.assertEqual(obj['status'], {'hard': {'requests.cpu': '10'},
+                                         'used': {'requests.cpu': '2'}})
+
+    def test_unreadable_rows(self):
+        with self.assertRaises(ValueError):
+            parse_projected_row('Job\tns\tname')
+        with self.assertRaises(ValueError):
+            parse_projected_row(projected_row(
+                kind='ResourceQuota', name='q', hard='map[requests.cpu:10]'))
+
+
+class ProjectionFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        kubectl = os.path.join(self.dir, 'kubectl')
+        with open(kubectl, 'w') as f:
+            f.write(FAKE_KUBECTL)
+        os.chmod(kubectl, 0o755)
+        patch = mock.patch.dict(os.environ, {
+            'PATH': self.dir + os.pathsep + os.environ.get('PATH', '')})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_unreadable_row_after_pages_restarts_in_full_mode(self):
+        backend = KubectlBackend(chunk_size=100)
+        pages = []
+        quota, jobs = get_namespace('ns', backend=backend,
+                                    on_page=lambda ns, grouped: pages.append(1))
+        self.assertFalse(backend.projected)
+        self.assertGreater(len(pages), 1)
+        self.assertEqual(len(jobs), JOBS)
+        self.assertEqual(quota['cpu']['limit'], 10)
+
+        # Later refreshes list full objects straight away
+        quota, jobs = get_namespace('ns', backend=backend)
+        self.assertEqual(len(jobs), JOBS)
+        self.assertEqual(quota['cpu']['used'], 2)
+
+    def test_list_restarts_in_full_mode(self):
+        backend = KubectlBackend(chunk_size=100)
+        grouped = backend.list('ns', 'jobs,pods,resourcequota')
+        self.assertFalse(backend.projected)
+        self.assertEqual(len(grouped['Job']), JOBS)
+        self.assertEqual(len(grouped['ResourceQuota']), 1)
+
+
+class KubectlWatchTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.kubectl = os.path.join(self.dir, 'kubectl')
+        with open(self.kubectl, 'w') as f:
+            f.write(FAKE_WATCH_KUBECTL)
+        os.chmod(self.kubectl, 0o755)
+        for patch in (mock.patch.dict(os.environ, {
+                'PATH': self.dir + os.pathsep + os.environ.get('PATH', '')}),
+                mock.patch.object(KubectlWatch, 'SYNC_IDLE', 0.2)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_replayed_listing_reconciles_the_store(self):
+        watcher = ResourceWatcher('ns', 'pods', KubectlBackend())
+        watcher.start()
+        try:
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                phases = {pod['metadata']['name']: pod['status']['phase']
+                          for pod in watcher.items()}
+                if phases == {'a': 'Succeeded', 'c': 'Running'}:
+                    break
+                time.sleep(0.02)
+        finally:
+            watcher.stop()
+
+        self.assertEqual(phases, {'a': 'Succeeded', 'c': 'Running'})
+        # Replayed objects are stored as slim as listed ones
+        for pod in watcher.items():
+            self.assertNotIn('managedFields', pod['metadata'])
+            self.assertNotIn('spec', pod)
+        with open(self.kubectl + '.args') as f:
+            args = f.read().split('\n')
+        self.assertIn('--watch', args)
+        self.assertNotIn('--watch-only', args)
+
+    def test_refused_watch_raises_and_backs_off(self):
+        with open(self.kubectl, 'w') as f:
+            f.write(FAKE_FORBIDDEN_KUBECTL)
+        watcher = ResourceWatcher('ns', 'pods', KubectlBackend())
+        with mock.patch('monitor.WATCH_RETRY', 0.05):
+            watcher.start()
+            try:
+                time.sleep(1.5)
+            finally:
+                watcher.stop()
+
+        self.assertIn('cannot watch', str(watcher.error))
+        self.assertEqual([p['metadata']['name'] for p in watcher.items()], ['a'])
+        # 0.05s doubling: about six attempts, not thirty
+        with open(self.kubectl + '.watches') as f:
+            self.assertLessEqual(len(f.read().split()), 8)
+
+
+def job(name, active=0, succeeded=0):
+    return {'kind': 'Job',
+            'metadata': {'name': name, 'namespace': 'ns', 'uid': f"uid-{name}"},
+            'spec': {'completions': 1},
+            'status': {'active': active, 'succeeded': succeeded}}
+
+
+def pod(name, owner=None, label=None):
+    metadata = {'name': name, 'namespace': 'ns', 'uid': f"uid-{name}"}
+    if owner:
+        metadata['ownerReferences'] = [{'kind': 'Job', 'name': owner}]
+    if label:
+        metadata['labels'] = {'job-name': label}
+    return {'kind': 'Pod', 'metadata': metadata,
+            'status': {'phase': 'Running'}}
+
+
+def pod_names(jobs):
+    return {job.name: sorted(pod.name for pod in job.pods) for job in jobs}
+
+
+class PodIndexTest(unittest.TestCase):
+    JOBS = {('ns', 'train'), ('ns', 'train-v2')}
+
+    def index(self, *pods):
+        return {owner: sorted(p['metadata']['name'] for p in owned)
+                for (_, owner), owned in index_pods_by_job(pods,
+                                                           self.JOBS).items()}
+
+    def test_owner_references(self):
+        self.assertEqual(
+            self.index(pod('x-1', owner='train-v2'), pod('x-2', owner='train')),
+            {'train': ['x-2'], 'train-v2': ['x-1']})
+
+    def test_job_name_labels(self):
+        labelled = pod('train-v2-abcde', label='train-v2')
+        new_label = pod('train-fghjk')
+        new_label['metadata']['labels'] = {
+            'batch.kubernetes.io/job-name': 'train'}
+        self.assertEqual(self.index(labelled, new_label),
+                         {'train': ['train-fghjk'],
+                          'train-v2': ['train-v2-abcde']})
+
+    def test_name_fallback_prefers_the_longest_job(self):
+        self.assertEqual(
+            self.index(pod('train-v2-abcde'), pod('train-fghjk'),
+                       pod('train-0-xyzwv'), pod('other-abcde')),
+            {'train': ['train-0-xyzwv', 'train-fghjk'],
+             'train-v2': ['train-v2-abcde']})
+
+
+class FilteredJobPodsTest(unittest.TestCase):
+    def test_filtered_out_job_keeps_its_pods(self):
+        jobs = [job('train', active=1), job('train-v2', succeeded=1)]
+        pods = [pod('train-fghjk'), pod('train-v2-abcde')]
+        shown = build_jobs(jobs, pods, JobFilter(statuses=[JobStatus.RUNNING]))
+        self.assertEqual(pod_names(shown), {'train': ['train-fghjk']})
+
+    def test_job_dropped_by_field_selector_keeps_its_pods(self):
+        # The server only returned ``train``; pods are listed unfiltered
+        pods = [pod('train-fghjk'), pod('train-v2-abcde'), pod('train-3-xyzwv')]
+        shown = build_jobs([job('train', active=1)], pods)
+        self.assertEqual(pod_names(shown),
+                         {'train': ['train-3-xyzwv', 'train-fghjk']})
+
+
+class ReplayingStream:
+    """A watch that replays its listing like KubectlWatch."""
+
+    replays_list = True
+    resource_version = None
+
+    def __iter__(self):
+        yield {'type': 'ADDED', 'object': pod('a-fghjk')}
+        yield {'type': 'SYNCED'}
+
+    def close(self):
+        pass
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'session.ndjson.gz')
+
+    def test_watch_passes_replays_list_and_skips_synced(self):
+        backend = MockBackend()
+        backend.watch = lambda *args, **kwargs: ReplayingStream()
+        recorder = RecordingBackend(backend, self.path, ['ns'])
+        stream = recorder.watch('ns', 'pods')
+        self.assertTrue(stream.replays_list)
+        self.assertEqual([e['type'] for e in stream], ['ADDED', 'SYNCED'])
+        recorder.close()
+
+        events = [record['event']['type'] for record in iter_records(self.path)
+                  if 'event' in record]
+        self.assertEqual(events, ['ADDED'])
+
+    def record(self, backend, *fetches):
+        recorder = RecordingBackend(backend, self.path, ['ns'])
+        try:
+            return [get_namespace('ns', recorder, **options)
+                    for options in fetches]
+        finally:
+            recorder.close()
+
+    def replay(self, **options):
+        # Fast enough that the latest recorded listing is due at once
+        return get_namespace('ns', ReplayBackend(self.path, speed=1e9),
+                             **options)
+
+    def summary(self, jobs):
+        return sorted((job.name, job.status, len(job.pods)) for job in jobs)
+
+    def test_combined_listing_replays_split(self):
+        (quota, jobs), = self.record(MockBackend(MockCluster(jobs=5, seed=1),
+                                                 chunk_size=2), {})
+        _, replayed = self.replay(with_quota=False)
+        replayed_quota, _ = self.replay(with_jobs=False)
+        self.assertEqual(self.summary(replayed), self.summary(jobs))
+        self.assertEqual(replayed_quota, quota)
+
+    def test_split_listings_replay_combined(self):
+        (_, jobs), (quota, _) = self.record(
+            MockBackend(MockCluster(jobs=5, seed=1), chunk_size=2),
+            {'with_quota': False}, {'with_jobs': False})
+        replayed_quota, replayed = self.replay()
+        self.assertEqual(self.summary(replayed), self.summary(jobs))
+        self.assertEqual(replayed_quota, quota)
+
+    def test_discarded_listing_is_not_replayed(self):
+        backend = BrokenListingBackend()
+        backend.broken = False
+        recorder = RecordingBackend(backend, self.path, ['ns'])
+        try:
+            _, jobs = get_namespace('ns', recorder)
+            backend.broken = True
+            with self.assertRaises(RuntimeError):
+                get_namespace('ns', recorder)
+        finally:
+            recorder.close()
+
+        _, replayed = self.replay()
+        self.assertEqual(len(replayed), 6)
+        self.assertEqual(self.summary(replayed), self.summary(jobs))
+
+
+class WindowsKeysTest(unittest.TestCase):
+    def test_scan_codes_only_after_a_prefix(self):
+        self.assertEqual(parse_windows_keys(b'\xe0H\x00P\xe0I\xe0Q\x00G\xe0O'),
+                         ['up', 'down', 'pgup', 'pgdn', 'home', 'end'])
+
+    def test_plain_letters_are_characters(self):
+        # Shift+Q quits; capitals that double as scan codes do not scroll
+        self.assertEqual(parse_windows_keys(b'QIGOHP'), ['q', 'p'])
+        self.assertEqual(parse_windows_keys(b'p\xe0Hq'), ['p', 'up', 'q'])
+        # Unknown scan codes (F-keys) are skipped with their prefix
+        self.assertEqual(parse_windows_keys(b'\x00;q'), ['q'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""ThreadedProfile over a worker thread, loaded back through pstats."""
+import os
+import sys
+import pstats
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import ThreadedProfile  # noqa: E402
+
+
+def worker_target(done):
+    total = 0
+    for i in range(20000):
+        total += i * i
+    done.append(total)
+
+
+class ThreadedProfileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_worker_runs_and_dump_loads(self):
+        profile = ThreadedProfile()
+        done = []
+        profile.enable()
+        try:
+            worker = threading.Thread(target=worker_target, args=(done,))
+            worker.start()
+            worker.join(5)
+        finally:
+            profile.disable()
+
+        self.assertEqual(len(done), 1, "worker thread died before its target")
+        path = os.path.join(self.tmp, 'session.prof')
+        profile.dump(path)
+
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn('worker_target', functions)
+
+
+if __name__ == '__main__':
+    unittest.main()